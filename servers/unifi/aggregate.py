@@ -0,0 +1,74 @@
+"""
+Grouped reductions over a client snapshot.
+
+One pass over the clients accumulates each group's count, byte totals and
+wireless signals; only the signals of each group are then sorted, for the
+minimum and percentiles. The rows are memoized on the snapshot per grouping
+field, so repeated breakdowns of the same snapshot cost nothing.
+"""
+
+from typing import Any, Optional
+
+from snapshot_cache import Snapshot
+
+# Group names accepted by the aggregation tool and the client field behind each
+GROUP_FIELDS = {"ap": "ap_mac", "ssid": "essid", "channel": "channel", "radio": "radio"}
+
+AGGREGATE_COLUMNS = (
+    "group", "clients", "wireless", "tx_bytes", "rx_bytes",
+    "signal_min", "signal_p10", "signal_p50", "signal_p90", "signal_mean",
+)
+
+
+def _percentile(sorted_values: list[int], p: float) -> int:
+    """Nearest-rank percentile of an ascending list"""
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(p * len(sorted_values)) - 1))]
+
+
+def _aggregate(clients: list[Any], field: str) -> list[list[Any]]:
+    groups: dict[Any, list[Any]] = {}  # key -> [clients, tx_bytes, rx_bytes, signals]
+    for client in clients:
+        key = client.get(field)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = [0, 0, 0, []]
+        group[0] += 1
+        group[1] += client.get("tx_bytes") or 0
+        group[2] += client.get("rx_bytes") or 0
+        signal = client.get("signal")
+        if signal is not None and not client.get("is_wired"):
+            group[3].append(signal)
+
+    rows = []
+    for key, (count, tx_bytes, rx_bytes, signals) in groups.items():
+        signals.sort()
+        rows.append([
+            key,
+            count,
+            len(signals),
+            tx_bytes,
+            rx_bytes,
+            signals[0] if signals else None,
+            _percentile(signals, 0.1) if signals else None,
+            _percentile(signals, 0.5) if signals else None,
+            _percentile(signals, 0.9) if signals else None,
+            round(sum(signals) / len(signals), 1) if signals else None,
+        ])
+    return rows
+
+
+def aggregate_clients(snapshot: Snapshot, field: str) -> list[list[Any]]:
+    """
+    One row per distinct value of field, in AGGREGATE_COLUMNS order (built once per snapshot).
+
+    Signal statistics cover wireless clients only (None when a group has none).
+    The rows are shared between calls; copy one before changing it.
+    """
+    return snapshot.memo(("aggregate", field), lambda: _aggregate(snapshot.data, field))
+
+
+def top_groups(rows: list[list[Any]], sort: str = "clients", limit: Optional[int] = None) -> list[list[Any]]:
+    """Rows ordered by one of the AGGREGATE_COLUMNS, largest first (missing values last)"""
+    i = AGGREGATE_COLUMNS.index(sort)
+    rows = sorted(rows, key=lambda row: (row[i] is not None, row[i] or 0), reverse=True)
+    return rows[:limit] if limit else rows
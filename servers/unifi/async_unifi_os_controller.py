@@ -0,0 +1,688 @@
+"""
+Async UniFi OS Controller for Cloud Key Gen 2 Plus and other UniFi OS devices.
+
+Same authentication flow, API paths and snapshot cache as UniFiOSController, but
+built on a pooled httpx.AsyncClient so independent requests can overlap on
+keep-alive connections (and share one HTTP/2 connection when h2 is installed).
+"""
+
+import asyncio
+import base64
+import json
+import math
+import os
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Hashable, Iterable, Optional
+
+import httpx
+
+import codec
+from json_stream import DataArrayDecoder
+from records import Record
+from report_cache import DEFAULT_REPORT_ATTRS, REPORT_INTERVALS, REPORT_TYPES, ReportCache, report_query_key
+from snapshot_cache import Snapshot, SnapshotCache, normalize_mac
+from snapshot_store import SnapshotStore
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False  # httpx[http2] is optional, fall back to HTTP/1.1
+
+# Endpoints whose last snapshot is persisted and may be served stale while refreshing
+STALE_ENDPOINTS = ("/stat/device", "/stat/sta", "/stat/health")
+
+
+def default_session_cache_path(host: str, port: int) -> Path:
+    """Where the login session for a controller is persisted between processes"""
+    return Path.home() / ".cache" / "unifi-mcp" / f"session-{host}-{port}.json"
+
+
+def _token_expired(token: str, leeway: float = 60.0) -> bool:
+    """Whether a UniFi OS TOKEN cookie (a JWT) is past its exp claim"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (IndexError, ValueError, AttributeError):
+        return False  # Not a JWT we can read; let the controller decide with a 401
+    return exp is not None and exp <= time.time() + leeway
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent coroutines that share a key into one execution.
+
+    The first caller for a key starts the coroutine function as a task; every
+    caller, including the first, awaits that task through a shield. A caller
+    that is cancelled (e.g. by a timeout) stops waiting without cancelling the
+    call the others are still waiting on.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn, *args, **kwargs):
+        """Await fn for key, or wait for the call already in flight"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.create_task(fn(*args, **kwargs))
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved when every waiter has given up
+
+
+class AsyncUniFiOSController:
+    """
+    Async controller for UniFi OS devices (Cloud Key Gen 2 Plus, UDM Pro, etc.)
+
+    Logs in lazily on the first request (or reuses a session persisted by an
+    earlier process) and logs in again transparently when the controller answers
+    401. All requests share one connection pool.
+
+    With stale_max_age set, an expired device, client or health snapshot up to
+    that many seconds old is returned at once while a background task fetches
+    a fresh one (stale-while-revalidate). With a snapshot_store, the last good
+    snapshots also survive restarts.
+    """
+
+    def __init__(self, host: str, username: str, password: str, port: int = 443,
+                 site_id: str = "default", ssl_verify: bool = False,
+                 cache_ttls: Optional[dict[str, float]] = None,
+                 http2: bool = False, max_connections: int = 10,
+                 session_cache: Optional[Path] = None, site_concurrency: int = 8,
+                 bulk_concurrency: int = 8,
+                 projections: Optional[dict[str, Iterable[str]]] = None,
+                 record_types: Optional[dict[str, type[Record]]] = None,
+                 report_cache: Optional[ReportCache] = None,
+                 snapshot_store: Optional[SnapshotStore] = None, stale_max_age: float = 0.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.site_id = site_id
+        self.site_concurrency = site_concurrency
+        self.bulk_concurrency = bulk_concurrency
+        # Compact record type per cached endpoint; its fields are the endpoint's projection
+        self.record_types = dict(record_types or {})
+        # Fields kept per cached endpoint; only these are decoded
+        self.projections = {endpoint: record_type.FIELDS for endpoint, record_type in self.record_types.items()}
+        self.projections.update((endpoint, tuple(fields)) for endpoint, fields in (projections or {}).items())
+        self._record_decoders = {}
+        if codec.TYPED_DECODING:
+            self._record_decoders = {endpoint: codec.records_decoder(fields)
+                                     for endpoint, fields in self.projections.items()}
+        self.ssl_verify = ssl_verify
+        self.base_url = f"https://{host}:{port}"
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            verify=ssl_verify,
+            http2=http2 and HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=10,
+        )
+        self.cache = SnapshotCache(cache_ttls)
+        self.report_cache = report_cache
+        self.snapshot_store = snapshot_store
+        self.stale_max_age = stale_max_age
+        self._flight = AsyncSingleFlight()
+        self._revalidating: dict[tuple[str, str], asyncio.Task] = {}
+        self._restored: set[tuple[str, str]] = set()
+        # Bumped by invalidate(); data fetched or restored under an older generation is discarded
+        self._generations: dict[str, int] = {}
+        self._background: set[asyncio.Task] = set()
+        self._login_lock = asyncio.Lock()
+        self._logged_in = False
+        self._session_generation = 0
+        self.session_cache = session_cache
+        if session_cache is not None:
+            self._load_session()
+
+    def _load_session(self):
+        """Reuse a still-valid session persisted by an earlier process"""
+        try:
+            saved = json.loads(self.session_cache.read_text())
+        except (OSError, ValueError):
+            return
+
+        cookies = saved.get("cookies") or {}
+        if saved.get("username") != self.username or not cookies.get("TOKEN"):
+            return
+        if _token_expired(cookies["TOKEN"]):
+            return
+
+        for name, value in cookies.items():
+            self.client.cookies.set(name, value, domain=self.host)
+        if saved.get("csrf_token"):
+            self.client.headers["X-CSRF-Token"] = saved["csrf_token"]
+        self._logged_in = True
+
+    def _save_session(self):
+        """Persist TOKEN and CSRF token to an owner-only cache file"""
+        if self.session_cache is None:
+            return
+
+        saved = {
+            "username": self.username,
+            "cookies": {cookie.name: cookie.value for cookie in self.client.cookies.jar},
+            "csrf_token": self.client.headers.get("X-CSRF-Token"),
+        }
+        try:
+            self.session_cache.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp_path = self.session_cache.with_suffix(".tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(saved, f)
+            os.replace(tmp_path, self.session_cache)
+        except OSError:
+            pass  # Persistence is an optimization; the in-memory session still works
+
+    async def _login(self):
+        """Authenticate with UniFi OS"""
+        self.client.cookies.clear()
+        self.client.headers.pop("X-CSRF-Token", None)
+        response = await self.client.post(
+            "/api/auth/login",
+            json={"username": self.username, "password": self.password},
+        )
+
+        if response.status_code != 200:
+            raise Exception(f"Login failed with status {response.status_code}: {response.text}")
+
+        # Cookies are automatically stored in the client; state-changing
+        # requests also need the CSRF token issued alongside them
+        csrf_token = response.headers.get("X-CSRF-Token")
+        if csrf_token:
+            self.client.headers["X-CSRF-Token"] = csrf_token
+        self._logged_in = True
+        self._session_generation += 1
+        self._save_session()
+
+    async def _ensure_login(self):
+        """Log in once, even when several requests start at the same time"""
+        if self._logged_in:
+            return
+        async with self._login_lock:
+            if not self._logged_in:
+                await self._login()
+
+    async def _relogin(self, generation: int):
+        """Log in again after a 401, unless another request already did"""
+        async with self._login_lock:
+            if self._session_generation == generation:
+                await self._login()
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send an authenticated request, re-authenticating once on 401"""
+        await self._ensure_login()
+        generation = self._session_generation
+        response = await self.client.request(method, path, **kwargs)
+
+        if response.status_code == 401:
+            await self._relogin(generation)
+            response = await self.client.request(method, path, **kwargs)
+
+        updated_csrf = response.headers.get("X-Updated-CSRF-Token")
+        if updated_csrf:
+            self.client.headers["X-CSRF-Token"] = updated_csrf
+        return response
+
+    async def warm_up(self):
+        """Log in (or validate a persisted session) and open a pooled connection ahead of the first tool call"""
+        await self.get_healthinfo()
+
+    async def aclose(self):
+        """Finish pending snapshot writes and close pooled connections"""
+        for task in self._revalidating.values():
+            task.cancel()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        await self.client.aclose()
+
+    def _api_path(self, endpoint: str, site: Optional[str] = None) -> str:
+        """Build API path for Network application (default site unless one is given)"""
+        # UniFi OS uses /proxy/network for the Network application API
+        if not endpoint.startswith("/"):
+            endpoint = f"/{endpoint}"
+        return f"/proxy/network/api/s/{site or self.site_id}{endpoint}"
+
+    async def _get(self, endpoint: str, params: Optional[dict] = None, site: Optional[str] = None) -> dict:
+        """Make GET request to API, sharing one round trip between concurrent identical calls"""
+        key = (site or self.site_id, endpoint,
+               tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+        return await self._flight.do(key, self._fetch, endpoint, params, site)
+
+    async def _fetch(self, endpoint: str, params: Optional[dict] = None, site: Optional[str] = None) -> dict:
+        """Perform the GET request and decode the data payload"""
+        response = await self._request("GET", self._api_path(endpoint, site), params=params)
+
+        if response.status_code != 200:
+            raise Exception(f"API request failed with status {response.status_code}: {response.text}")
+
+        data = codec.loads(response.content)
+        return data.get("data", [])
+
+    async def iter_records(self, endpoint: str, fields: Optional[Iterable[str]] = None,
+                           params: Optional[dict] = None,
+                           site: Optional[str] = None) -> AsyncIterator[dict[str, Any]]:
+        """
+        Stream the records of an endpoint's data array as they are decoded.
+
+        Only the given fields of each record are kept, so peak memory is one
+        chunk of the body plus the projected records rather than the full
+        response three times over (bytes, text and object graph).
+        """
+        await self._ensure_login()
+        path = self._api_path(endpoint, site)
+
+        for attempt in range(2):
+            generation = self._session_generation
+            async with self.client.stream("GET", path, params=params) as response:
+                if response.status_code == 401 and attempt == 0:
+                    await self._relogin(generation)
+                    continue
+
+                if response.status_code != 200:
+                    await response.aread()
+                    raise Exception(f"API request failed with status {response.status_code}: {response.text}")
+
+                decoder = DataArrayDecoder(fields)
+                async for chunk in response.aiter_text():
+                    for record in decoder.feed(chunk):
+                        yield record
+                for record in decoder.close():
+                    yield record
+                return
+
+    async def _get_projected(self, endpoint: str, site: Optional[str] = None) -> list[dict[str, Any]]:
+        """Decode an endpoint keeping only its configured fields"""
+        decode = self._record_decoders.get(endpoint)
+        if decode is None:
+            # No typed decoder (msgspec missing): stream-decode to bound memory instead
+            fields = self.projections[endpoint]
+            return [record async for record in self.iter_records(endpoint, fields, site=site)]
+
+        response = await self._request("GET", self._api_path(endpoint, site))
+        if response.status_code != 200:
+            raise Exception(f"API request failed with status {response.status_code}: {response.text}")
+        return decode(response.content)
+
+    async def _post(self, endpoint: str, json_data: Optional[dict] = None, site: Optional[str] = None) -> dict:
+        """Make POST request to API"""
+        response = await self._request("POST", self._api_path(endpoint, site), json=json_data)
+
+        if response.status_code != 200:
+            raise Exception(f"API request failed with status {response.status_code}: {response.text}")
+
+        data = codec.loads(response.content)
+        return data.get("data", [])
+
+    async def _snapshot(self, endpoint: str, max_age: Optional[float] = None,
+                        site: Optional[str] = None) -> Snapshot:
+        """
+        GET through the snapshot cache (max_age=0 forces a refresh).
+
+        Without an explicit max_age, an expired snapshot within stale_max_age
+        (possibly restored from disk) is served while it is refreshed in the
+        background.
+        """
+        site = site or self.site_id
+        snapshot = self.cache.get(endpoint, max_age, site)
+        if snapshot is not None:
+            return snapshot
+
+        if max_age is None and self.stale_max_age > 0 and endpoint in STALE_ENDPOINTS:
+            stale = self.cache.peek(endpoint, site) or await self._restore(endpoint, site)
+            if stale is not None and stale.age <= self.stale_max_age:
+                self._revalidate(endpoint, site)
+                return stale
+
+        return await self._refresh(endpoint, site)
+
+    async def _fetch_records(self, endpoint: str, site: str) -> list[dict[str, Any]]:
+        if endpoint in self.projections:
+            return await self._get_projected(endpoint, site)
+        return await self._fetch(endpoint, site=site)
+
+    async def _refresh(self, endpoint: str, site: str) -> Snapshot:
+        """Fetch an endpoint into the cache (and persist it in the background)"""
+        while True:
+            generation = self._generations.get(endpoint, 0)
+            # Callers after an invalidation never join a fetch that started before it
+            data = await self._flight.do((site, endpoint, "snapshot", generation),
+                                         self._fetch_records, endpoint, site)
+            if self._generations.get(endpoint, 0) == generation:
+                break
+            # Invalidated mid-fetch (e.g. a client was blocked): the data predates the change
+
+        record_type = self.record_types.get(endpoint)
+        if record_type is not None:
+            data = [record_type.from_dict(record) for record in data]
+        snapshot = self.cache.put(endpoint, data, site)
+
+        if self.snapshot_store is not None and endpoint in STALE_ENDPOINTS:
+            def save():
+                if self._generations.get(endpoint, 0) == generation:
+                    self.snapshot_store.save(site, endpoint, data)
+
+            task = asyncio.create_task(asyncio.to_thread(save))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        return snapshot
+
+    def _revalidate(self, endpoint: str, site: str):
+        """Refresh an endpoint in the background unless a refresh is already running"""
+        key = (site, endpoint)
+        if key in self._revalidating:
+            return
+
+        async def run():
+            try:
+                await self._refresh(endpoint, site)
+            except Exception:
+                pass  # Keep serving the stale snapshot; the next call tries again
+            finally:
+                # An invalidation may have cancelled this task and started another under the key
+                if self._revalidating.get(key) is task:
+                    del self._revalidating[key]
+
+        task = self._revalidating[key] = asyncio.create_task(run())
+
+    async def _restore(self, endpoint: str, site: str) -> Optional[Snapshot]:
+        """Load the snapshot an earlier process persisted (once per endpoint and site)"""
+        if self.snapshot_store is None or (site, endpoint) in self._restored:
+            return None
+        self._restored.add((site, endpoint))
+        generation = self._generations.get(endpoint, 0)
+
+        decode = self._record_decoders.get(endpoint)
+        if decode is None:
+            def decode(body) -> list[dict[str, Any]]:
+                return codec.loads(body).get("data", [])
+
+        loaded = await asyncio.to_thread(self.snapshot_store.load, site, endpoint, decode)
+        if loaded is None or self._generations.get(endpoint, 0) != generation:
+            return None
+        data, saved_at = loaded
+        record_type = self.record_types.get(endpoint)
+        if record_type is not None:
+            data = [record_type.from_dict(record) for record in data]
+        # Keep the original age so callers see how old the data is
+        return self.cache.put(endpoint, data, site, fetched_at=time.monotonic() - (time.time() - saved_at))
+
+    async def _cached_get(self, endpoint: str, max_age: Optional[float] = None,
+                          site: Optional[str] = None) -> list[dict[str, Any]]:
+        """Cached list of records for an endpoint"""
+        return (await self._snapshot(endpoint, max_age, site)).data
+
+    def invalidate(self, *endpoints: str):
+        """
+        Drop cached snapshots so the next read hits the controller.
+
+        Stale copies are gone too: background refreshes already running are
+        cancelled, their results discarded, and the persisted snapshots
+        deleted, so data from before a command is never served after it.
+        """
+        self.cache.invalidate(*endpoints)
+        for endpoint in endpoints or STALE_ENDPOINTS:
+            self._generations[endpoint] = self._generations.get(endpoint, 0) + 1
+            for key in [key for key in self._revalidating if key[1] == endpoint]:
+                self._revalidating.pop(key).cancel()
+            if self.snapshot_store is not None:
+                self.snapshot_store.discard(endpoint)
+
+    def pin_snapshot(self, snapshot: Snapshot) -> int:
+        """Keep a snapshot available for paging after newer data replaces it; returns its id"""
+        return self.cache.pin(snapshot)
+
+    def pinned_snapshot(self, snapshot_id: int) -> Optional[Snapshot]:
+        """A snapshot pinned for paging, or None if it has been evicted"""
+        return self.cache.pinned(snapshot_id)
+
+    # Event Stream Support
+
+    def events_url(self, site: Optional[str] = None) -> str:
+        """Websocket URL of the Network application's event stream for a site"""
+        return f"wss://{self.host}:{self.port}/proxy/network/wss/s/{site or self.site_id}/events"
+
+    def auth_headers(self) -> dict[str, str]:
+        """Session cookie and CSRF headers for connections made outside the HTTP pool"""
+        headers = {}
+        cookies = "; ".join(f"{cookie.name}={cookie.value}" for cookie in self.client.cookies.jar)
+        if cookies:
+            headers["Cookie"] = cookies
+        if self.client.headers.get("X-CSRF-Token"):
+            headers["X-CSRF-Token"] = self.client.headers["X-CSRF-Token"]
+        return headers
+
+    def apply_records(self, endpoint: str, records: list[dict[str, Any]], site: Optional[str] = None,
+                      removed: Iterable[str] = ()) -> Optional[Snapshot]:
+        """Merge pushed records (trimmed like polled ones) and removals into the cached snapshot"""
+        return self.cache.upsert(endpoint, records, site or self.site_id,
+                                 self.projections.get(endpoint), self.record_types.get(endpoint), removed)
+
+    def set_live(self, endpoints: Iterable[str], live: bool, site: Optional[str] = None):
+        """Serve cached snapshots past their TTL while an event stream keeps them current"""
+        for endpoint in endpoints:
+            self.cache.set_live(endpoint, site or self.site_id, live)
+
+    # Device Methods
+
+    async def get_aps(self, max_age: Optional[float] = None,
+                      site: Optional[str] = None) -> list[dict[str, Any]]:
+        """Get all devices (APs, switches, gateways)"""
+        return await self._cached_get("/stat/device", max_age, site)
+
+    async def get_devices_snapshot(self, max_age: Optional[float] = None,
+                                   site: Optional[str] = None) -> Snapshot:
+        """Cached device list together with its indexes"""
+        return await self._snapshot("/stat/device", max_age, site)
+
+    async def refresh_device(self, mac: str) -> Optional[dict[str, Any]]:
+        """Fetch one device straight from the controller"""
+        devices = await self._get(f"/stat/device/{normalize_mac(mac)}")
+        if not devices:
+            return None
+        record_type = self.record_types.get("/stat/device")
+        return record_type.from_dict(devices[0]) if record_type is not None else devices[0]
+
+    async def restart_ap(self, mac: str):
+        """Restart a device by MAC address"""
+        result = await self._post("/cmd/devmgr", {"cmd": "restart", "mac": mac})
+        self.invalidate("/stat/device")
+        return result
+
+    # Client Methods
+
+    async def get_clients(self, max_age: Optional[float] = None,
+                          site: Optional[str] = None) -> list[dict[str, Any]]:
+        """Get all connected clients"""
+        return await self._cached_get("/stat/sta", max_age, site)
+
+    async def get_clients_snapshot(self, max_age: Optional[float] = None,
+                                   site: Optional[str] = None) -> Snapshot:
+        """Cached client list together with its indexes"""
+        return await self._snapshot("/stat/sta", max_age, site)
+
+    async def block_client(self, mac: str):
+        """Block a client by MAC address"""
+        result = await self._post("/cmd/stamgr", {"cmd": "block-sta", "mac": mac})
+        self.invalidate("/stat/sta")
+        return result
+
+    async def unblock_client(self, mac: str):
+        """Unblock a client by MAC address"""
+        result = await self._post("/cmd/stamgr", {"cmd": "unblock-sta", "mac": mac})
+        self.invalidate("/stat/sta")
+        return result
+
+    async def authorize_guest(self, mac: str, minutes: int = 480,
+                              up_bandwidth: Optional[int] = None,
+                              down_bandwidth: Optional[int] = None):
+        """Authorize a guest client with optional bandwidth limits"""
+        cmd_data = {
+            "cmd": "authorize-guest",
+            "mac": mac,
+            "minutes": minutes
+        }
+
+        if up_bandwidth:
+            cmd_data["up"] = up_bandwidth
+        if down_bandwidth:
+            cmd_data["down"] = down_bandwidth
+
+        result = await self._post("/cmd/stamgr", cmd_data)
+        self.invalidate("/stat/sta")
+        return result
+
+    async def disconnect_client(self, mac: str):
+        """Disconnect a client (for reassociation)"""
+        result = await self._post("/cmd/stamgr", {"cmd": "kick-sta", "mac": mac})
+        self.invalidate("/stat/sta")
+        return result
+
+    async def bulk_client_command(self, cmd: str, macs: list[str],
+                                  **params) -> list[tuple[str, Optional[BaseException]]]:
+        """
+        Send one stamgr command (block-sta, unblock-sta, authorize-guest, kick-sta) to many clients.
+
+        Runs at most bulk_concurrency requests at a time over the pooled client
+        and drops the cached client list once at the end instead of per client.
+        Returns (mac, None) on success or (mac, exception) for each unique MAC.
+        """
+        macs = list(dict.fromkeys(normalize_mac(mac) for mac in macs if mac))
+        semaphore = asyncio.Semaphore(self.bulk_concurrency)
+
+        async def send(mac: str):
+            async with semaphore:
+                await self._post("/cmd/stamgr", {"cmd": cmd, "mac": mac, **params})
+
+        try:
+            outcomes = await asyncio.gather(*(send(mac) for mac in macs), return_exceptions=True)
+        finally:
+            self.invalidate("/stat/sta")
+
+        return [(mac, outcome) for mac, outcome in zip(macs, outcomes)]
+
+    # System Methods
+
+    async def get_alarms(self, site: Optional[str] = None, limit: Optional[int] = None,
+                         archived: Optional[bool] = None, within_hours: Optional[float] = None,
+                         newer_than: Optional[int] = None, oldest_first: bool = False) -> list[dict[str, Any]]:
+        """
+        Get system alarms/alerts, newest first (or oldest first, for paging forward).
+
+        The limit, archived flag and time bound are sent to the controller so
+        it only serializes the alarms asked for. newer_than (epoch ms, as in
+        the alarms' datetime field) is pushed down as an hour-granular bound and
+        then applied exactly; those alarms are sorted locally and the limit is
+        applied after that filter, so alarms at or before newer_than never use
+        up the page.
+        """
+        query: dict[str, Any] = {"_sort": "+time" if oldest_first else "-time"}
+        if limit and newer_than is None:
+            query["_limit"] = limit
+        if archived is not None:
+            query["archived"] = archived
+        if newer_than is not None:
+            since_hours = (time.time() * 1000 - newer_than) / 3600000
+            within_hours = since_hours if within_hours is None else min(within_hours, since_hours)
+        if within_hours is not None:
+            query["within"] = max(1, math.ceil(within_hours))
+
+        alarms = await self._post("/stat/alarm", query, site)
+        if newer_than is not None:
+            alarms = [alarm for alarm in alarms if alarm.get("datetime", 0) > newer_than]
+            # Every newer alarm is here, so order them locally: paging must not depend on the
+            # controller honoring _sort, or a page could skip alarms the cursor then moves past
+            alarms.sort(key=lambda alarm: alarm.get("datetime", 0), reverse=not oldest_first)
+            if limit:
+                alarms = alarms[:limit]
+        return alarms
+
+    async def get_report(self, interval: str, report_type: str, start: int, end: int,
+                         attrs: Optional[Iterable[str]] = None, macs: Optional[Iterable[str]] = None,
+                         site: Optional[str] = None) -> list[dict[str, Any]]:
+        """
+        Historical rollups from /stat/report/<interval>.<report_type>, oldest first.
+
+        start and end are epoch ms. With a report cache, finished buckets come
+        from disk and only the uncovered part of the range (normally the
+        current bucket) is requested from the controller.
+        """
+        if interval not in REPORT_INTERVALS:
+            raise ValueError(f"Unknown report interval '{interval}'")
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"Unknown report type '{report_type}'")
+
+        site = site or self.site_id
+        endpoint = f"/stat/report/{interval}.{report_type}"
+        attrs = list(dict.fromkeys([*(attrs or DEFAULT_REPORT_ATTRS[report_type]), "time"]))
+        macs = [normalize_mac(mac) for mac in macs] if macs else None
+
+        async def fetch(low: int, high: int) -> list[dict[str, Any]]:
+            query: dict[str, Any] = {"attrs": attrs, "start": low, "end": high}
+            if macs:
+                query["macs"] = macs
+            return await self._post(endpoint, query, site)
+
+        if self.report_cache is None:
+            return await fetch(start, end)
+
+        key = report_query_key(site, interval, report_type, attrs, macs)
+
+        async def fill():
+            for low, high in await asyncio.to_thread(self.report_cache.missing, key, start, end):
+                rows = await fetch(low, high)
+                await asyncio.to_thread(self.report_cache.store, key, interval, low, high, rows)
+
+        # Concurrent identical queries share the fetch of the missing buckets
+        await self._flight.do(("report", key, start, end), fill)
+        return await asyncio.to_thread(self.report_cache.rows, key, start, end)
+
+    async def get_healthinfo(self, max_age: Optional[float] = None,
+                             site: Optional[str] = None) -> list[dict[str, Any]]:
+        """Get health information"""
+        return await self._cached_get("/stat/health", max_age, site)
+
+    async def get_health_snapshot(self, max_age: Optional[float] = None,
+                                  site: Optional[str] = None) -> Snapshot:
+        """Cached health subsystems list"""
+        return await self._snapshot("/stat/health", max_age, site)
+
+    async def get_sites(self) -> list[dict[str, Any]]:
+        """Get list of sites"""
+        # Sites list is at controller level, not site-specific
+        response = await self._request("GET", "/proxy/network/api/self/sites")
+
+        if response.status_code != 200:
+            raise Exception(f"Failed to get sites: {response.status_code}")
+
+        data = codec.loads(response.content)
+        return data.get("data", [])
+
+    async def for_each_site(self, fn, sites: Optional[list[str]] = None) -> dict[str, Any]:
+        """
+        Run fn(site) for every site (or the given ones) with bounded concurrency.
+
+        Failures are isolated: a site whose call raised maps to the exception
+        instead of aborting the other sites.
+        """
+        if sites is None:
+            sites = [site["name"] for site in await self.get_sites()]
+
+        semaphore = asyncio.Semaphore(self.site_concurrency)
+
+        async def run(site: str):
+            async with semaphore:
+                return await fn(site)
+
+        results = await asyncio.gather(*(run(site) for site in sites), return_exceptions=True)
+        return dict(zip(sites, results))
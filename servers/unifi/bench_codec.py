@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the JSON codecs on /stat/sta payloads.
+
+Compares stdlib json with orjson and msgspec (whichever are installed) for
+decoding a full response, decoding only the fields the tools use, and
+encoding a formatted client list. Pass recorded response bodies, e.g.
+
+    curl -k -b "TOKEN=..." https://HOST/proxy/network/api/s/default/stat/sta > sta.json
+    python bench_codec.py sta.json
+
+or use --synthesize N to generate a payload of N clients with a realistic
+number of keys per record.
+"""
+
+import argparse
+import json
+import random
+import sys
+import timeit
+from pathlib import Path
+
+import codec
+from json_stream import DataArrayDecoder
+from records import CLIENT_FIELDS, Client
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def synthesize(count: int) -> bytes:
+    """A /stat/sta body of count clients with ~90 keys each, like a real controller's"""
+    clients = []
+    for i in range(count):
+        client = {
+            "mac": f"aa:bb:cc:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}",
+            "name": f"client-{i}", "hostname": f"host-{i}", "ip": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+            "is_wired": i % 5 == 0, "ap_mac": f"d0:bb:cc:00:00:{i % 40:02x}", "essid": random.choice(["corp", "guest", "iot"]),
+            "channel": random.choice([1, 6, 11, 36, 44, 149]), "signal": random.randint(-90, -30),
+            "uptime": random.randint(0, 10 ** 6), "tx_bytes": random.randint(0, 10 ** 11),
+            "rx_bytes": random.randint(0, 10 ** 11), "vlan": random.choice([1, 10, 20]),
+            "site_id": "5f0c2a2b1c9d440001a0b1c2", "oui": "Apple", "radio": "na", "radio_proto": "ax",
+            "qos_policy_applied": True, "first_seen": 1690000000, "last_seen": 1700000000,
+        }
+        for k in range(70):
+            client[f"stat_{k}"] = random.random() if k % 3 else f"value-{k}-{i}"
+        clients.append(client)
+    return json.dumps({"meta": {"rc": "ok"}, "data": clients}).encode()
+
+
+def stream_decode(body: bytes, fields, chunk_size: int = 65536) -> list:
+    """The stdlib streaming path used when msgspec is not installed"""
+    text = body.decode()
+    decoder = DataArrayDecoder(fields)
+    records = []
+    for i in range(0, len(text), chunk_size):
+        records.extend(decoder.feed(text[i:i + chunk_size]))
+    records.extend(decoder.close())
+    return records
+
+
+def bench(label: str, fn, number: int):
+    seconds = min(timeit.repeat(fn, number=number, repeat=3)) / number
+    print(f"  {label:<32} {seconds * 1000:9.2f} ms")
+
+
+def run(name: str, body: bytes, number: int):
+    records = json.loads(body)["data"]
+    print(f"{name}: {len(body) / 1e6:.1f} MB, {len(records)} clients (selected codec: {codec.NAME})")
+
+    print(" full decode")
+    bench("json.loads", lambda: json.loads(body), number)
+    if orjson is not None:
+        bench("orjson.loads", lambda: orjson.loads(body), number)
+    if msgspec is not None:
+        decoder = msgspec.json.Decoder()
+        bench("msgspec decode", lambda: decoder.decode(body), number)
+
+    print(" projected decode (tool fields only)")
+    bench("json DataArrayDecoder stream", lambda: stream_decode(body, CLIENT_FIELDS), number)
+    decode = codec.records_decoder(CLIENT_FIELDS)
+    if decode is not None:
+        bench("msgspec typed structs", lambda: decode(body), number)
+
+    print(" snapshot records")
+    projected = stream_decode(body, CLIENT_FIELDS)
+    bench("Client.from_dict", lambda: [Client.from_dict(r) for r in projected], number)
+
+    projected = [{k: r[k] for k in CLIENT_FIELDS if k in r} for r in records]
+    response = {"count": len(projected), "clients": projected}
+    print(" encode formatted list")
+    bench("json.dumps indent=2", lambda: json.dumps(response, indent=2), number)
+    bench("json.dumps compact", lambda: json.dumps(response, separators=(",", ":")), number)
+    if orjson is not None:
+        bench("orjson.dumps", lambda: orjson.dumps(response), number)
+    if msgspec is not None:
+        encoder = msgspec.json.Encoder()
+        bench("msgspec encode", lambda: encoder.encode(response), number)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON codecs on /stat/sta payloads")
+    parser.add_argument("payloads", nargs="*", help="Recorded /stat/sta response bodies")
+    parser.add_argument("--synthesize", type=int, metavar="N", help="Generate a payload of N clients")
+    parser.add_argument("--number", type=int, default=5, help="Runs per timing (best of 3)")
+    args = parser.parse_args()
+
+    if not args.payloads and not args.synthesize:
+        parser.error("pass recorded payload files or --synthesize N")
+
+    for path in args.payloads:
+        run(path, Path(path).read_bytes(), args.number)
+    if args.synthesize:
+        random.seed(0)
+        run(f"synthetic x{args.synthesize}", synthesize(args.synthesize), args.number)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Versioned change tracking for client and device snapshots.
+
+Each observed snapshot is reduced to one integer fingerprint per MAC over the
+fields that matter for change detection (not byte counters or signal, which
+move constantly). Comparing fingerprints between snapshots yields added,
+changed and removed MACs, tagged with the version in which they changed, so a
+caller holding a cursor only receives what changed since then.
+"""
+
+import json
+from typing import Any, Iterable, Optional
+
+from snapshot_cache import Snapshot, normalize_mac
+
+
+class ChangeFeed:
+    """
+    Fingerprints of the last observed record set plus per-MAC change versions.
+
+    Removals are remembered as tombstones for max_versions versions; a cursor
+    older than that can no longer be answered incrementally and must resync.
+    """
+
+    def __init__(self, fields: Iterable[str], max_versions: int = 256):
+        self.fields = tuple(fields)
+        self.max_versions = max_versions
+        self.version = 0
+        self.floor = 0  # Oldest cursor that can still be answered incrementally
+        # mac -> [fingerprint, created_version, modified_version]
+        self._entries: dict[str, list[int]] = {}
+        self._tombstones: dict[str, int] = {}
+        self._records: dict[str, dict[str, Any]] = {}
+        self._last_snapshot: Optional[Snapshot] = None
+
+    @staticmethod
+    def _value(record: dict[str, Any], field: str) -> Any:
+        """A field value; "uplink.uplink_mac" reads a key of a nested object"""
+        name, _, key = field.partition(".")
+        value = record.get(name)
+        if key:
+            value = value.get(key) if isinstance(value, dict) else None
+        return value
+
+    def _fingerprint(self, record: dict[str, Any]) -> int:
+        values = []
+        for field in self.fields:
+            value = self._value(record, field)
+            if isinstance(value, (dict, list)):
+                # Nested objects aren't hashable; their sorted serialization is
+                value = json.dumps(value, sort_keys=True, default=str)
+            values.append(value)
+        return hash(tuple(values))
+
+    def observe(self, snapshot: Snapshot) -> int:
+        """Diff a snapshot against the previous one; returns the current version"""
+        if snapshot is self._last_snapshot:
+            return self.version
+        self._last_snapshot = snapshot
+
+        current = {normalize_mac(r.get("mac")): r for r in snapshot.data if r.get("mac")}
+        version = self.version + 1
+        changed = False
+
+        for mac, record in current.items():
+            fingerprint = self._fingerprint(record)
+            entry = self._entries.get(mac)
+            if entry is None:
+                self._entries[mac] = [fingerprint, version, version]
+                self._tombstones.pop(mac, None)
+                changed = True
+            elif entry[0] != fingerprint:
+                entry[0] = fingerprint
+                entry[2] = version
+                changed = True
+
+        for mac in [mac for mac in self._entries if mac not in current]:
+            del self._entries[mac]
+            self._tombstones[mac] = version
+            changed = True
+
+        self._records = current
+        if changed:
+            self.version = version
+            self._prune()
+        return self.version
+
+    def _prune(self):
+        """Forget tombstones older than the retained version window"""
+        floor = self.version - self.max_versions
+        if floor <= self.floor:
+            return
+        self.floor = floor
+        for mac in [mac for mac, removed in self._tombstones.items() if removed <= floor]:
+            del self._tombstones[mac]
+
+    def changes_since(self, cursor: int) -> Optional[dict[str, Any]]:
+        """
+        Records added or changed and MACs removed after cursor.
+
+        Returns None when the cursor is older than the retained window (or from
+        the future, e.g. after a server restart) and the caller must resync.
+        """
+        if cursor < self.floor or cursor > self.version:
+            return None
+
+        added = []
+        changed = []
+        for mac, (_, created, modified) in self._entries.items():
+            if created > cursor:
+                added.append(self._records[mac])
+            elif modified > cursor:
+                changed.append(self._records[mac])
+
+        removed = [mac for mac, version in self._tombstones.items() if version > cursor]
+        return {"added": added, "changed": changed, "removed": removed}
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,100 @@
+"""
+JSON codec used for controller responses and pushed events.
+
+Uses msgspec or orjson when installed and the standard json module otherwise.
+With msgspec, list responses can also be decoded straight into typed structs
+that declare only the fields the tools use: every other key of each record is
+skipped while parsing instead of being materialized and then thrown away.
+"""
+
+import json
+from typing import Any, Callable, Iterable, Optional
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None  # Optional fast codec
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Optional fast codec
+
+if msgspec is not None:
+    NAME = "msgspec"
+    _decoder = msgspec.json.Decoder()
+    _encoder = msgspec.json.Encoder(enc_hook=str)
+
+    def loads(data: bytes) -> Any:
+        """Decode a JSON document"""
+        try:
+            return _decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def dumps(obj: Any) -> str:
+        """Encode an object as compact JSON"""
+        return _encoder.encode(obj).decode()
+
+elif orjson is not None:
+    NAME = "orjson"
+
+    def loads(data: bytes) -> Any:
+        """Decode a JSON document"""
+        return orjson.loads(data)  # orjson.JSONDecodeError is a ValueError
+
+    def dumps(obj: Any) -> str:
+        """Encode an object as compact JSON"""
+        return orjson.dumps(obj, default=str).decode()
+
+else:
+    NAME = "json"
+
+    def loads(data: bytes) -> Any:
+        """Decode a JSON document"""
+        if isinstance(data, memoryview):
+            data = data.tobytes()  # json only takes bytes and str, not other buffers
+        return json.loads(data)
+
+    def dumps(obj: Any) -> str:
+        """Encode an object as compact JSON"""
+        return json.dumps(obj, separators=(",", ":"), default=str)
+
+
+# Whether records_decoder() can decode into typed structs
+TYPED_DECODING = msgspec is not None
+
+
+def records_decoder(fields: Iterable[str]) -> Optional[Callable[[bytes], list[dict[str, Any]]]]:
+    """
+    Build a decoder for {"data": [...]} responses that keeps only the given fields.
+
+    Each record is decoded into a struct declaring just those fields (values
+    untyped, since controllers vary in how they encode them) and returned as a
+    dict of the fields present. Returns None when msgspec is not installed.
+    """
+    if msgspec is None:
+        return None
+
+    fields = tuple(fields)
+    # Field names such as "user-num_sta" aren't identifiers; decode them under f0, f1, ...
+    record_type = msgspec.defstruct(
+        "Record",
+        [(f"f{i}", Any, msgspec.field(default=msgspec.UNSET, name=name)) for i, name in enumerate(fields)],
+    )
+    envelope_type = msgspec.defstruct("Response", [("data", list[record_type], [])])
+    decoder = msgspec.json.Decoder(envelope_type)
+    attributes = [(f"f{i}", name) for i, name in enumerate(fields)]
+    unset = msgspec.UNSET
+
+    def decode(body: bytes) -> list[dict[str, Any]]:
+        try:
+            records = decoder.decode(body).data
+        except msgspec.DecodeError as e:
+            raise ValueError(f"Malformed JSON response from controller: {e}") from e
+        return [
+            {name: value for attr, name in attributes if (value := getattr(record, attr)) is not unset}
+            for record in records
+        ]
+
+    return decode
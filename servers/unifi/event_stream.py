@@ -0,0 +1,190 @@
+"""
+Push-based updates from the UniFi Network event stream.
+
+UniFi OS pushes state changes over a websocket at
+/proxy/network/wss/s/{site}/events. Each message looks like a regular API
+response, {"meta": {"message": "sta:sync", ...}, "data": [record, ...]}, with
+partial records keyed by MAC. The consumer merges them into the controller's
+snapshot cache so reads are served locally without a round trip. Messages that
+arrive together are coalesced per MAC and applied as one new snapshot per
+endpoint. While the stream is down the cache falls back to its normal TTL
+polling.
+"""
+
+import asyncio
+import ssl
+import time
+from typing import Any, Iterable, Optional
+
+import codec
+from snapshot_cache import normalize_mac
+
+try:
+    from websockets.asyncio.client import connect
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False  # websockets is optional, polling only
+
+DEVICE_ENDPOINT = "/stat/device"
+CLIENT_ENDPOINT = "/stat/sta"
+
+# Message types carrying (partial) records for each cached endpoint
+DEVICE_MESSAGES = {"device:sync", "device:update"}
+CLIENT_MESSAGES = {"sta:sync"}
+
+# Events after which a client is no longer connected
+DISCONNECT_EVENTS = {"EVT_WU_Disconnected", "EVT_WG_Disconnected", "EVT_LU_Disconnected"}
+
+
+class EventStream:
+    """
+    Keeps a controller's device and client snapshots current from pushed events.
+
+    On each (re)connect the snapshots are refetched once, then marked live so
+    the cache serves them past their TTL. On disconnect they are marked not
+    live again and the consumer reconnects with exponential backoff.
+    """
+
+    def __init__(self, ctrl, site: Optional[str] = None, url: Optional[str] = None,
+                 min_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.ctrl = ctrl
+        self.site = site or ctrl.site_id
+        self.url = url or ctrl.events_url(self.site)
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.connects = 0
+        self.messages = 0
+        self.last_message: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        # Changes not yet applied, by endpoint and MAC: the merged partial record, or None if removed
+        self._pending: dict[str, dict[str, Optional[dict[str, Any]]]] = {}
+        self._flush_scheduled = False
+
+    def status(self) -> dict[str, Any]:
+        """Connection state and counters"""
+        return {
+            "url": self.url,
+            "site": self.site,
+            "connected": self.connected,
+            "connects": self.connects,
+            "messages": self.messages,
+            "last_message_age": round(time.time() - self.last_message, 1) if self.last_message else None,
+            "last_error": self.last_error,
+        }
+
+    def start(self):
+        """Start consuming in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop consuming and fall back to polling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._set_live(False)
+
+    def _set_live(self, live: bool):
+        self.connected = live
+        self.ctrl.set_live((DEVICE_ENDPOINT, CLIENT_ENDPOINT), live, self.site)
+
+    def _ssl_context(self) -> Optional[ssl.SSLContext]:
+        if not self.url.startswith("wss:"):
+            return None
+        context = ssl.create_default_context()
+        if not self.ctrl.ssl_verify:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        return context
+
+    async def _run(self):
+        backoff = self.min_backoff
+        while True:
+            try:
+                await self._consume()
+                backoff = self.min_backoff
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+            finally:
+                self._set_live(False)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def _consume(self):
+        # Log in (or reuse the session) so the websocket handshake carries TOKEN
+        await self.ctrl._ensure_login()
+        async with connect(self.url, additional_headers=self.ctrl.auth_headers(),
+                           ssl=self._ssl_context()) as websocket:
+            # Updates pushed before this point were missed; start from a full fetch
+            await asyncio.gather(
+                self.ctrl.get_aps(max_age=0, site=self.site),
+                self.ctrl.get_clients(max_age=0, site=self.site),
+            )
+            self.connects += 1
+            self.last_error = None
+            self._set_live(True)
+
+            async for message in websocket:
+                self.handle(message)
+
+    def handle(self, message: str):
+        """Apply one pushed message to the cached snapshots"""
+        try:
+            payload = codec.loads(message)
+        except ValueError:
+            return
+        if not isinstance(payload, dict):
+            return
+
+        kind = (payload.get("meta") or {}).get("message")
+        records = [r for r in payload.get("data") or [] if isinstance(r, dict)]
+        self.messages += 1
+        self.last_message = time.time()
+
+        if kind in CLIENT_MESSAGES:
+            self._queue(CLIENT_ENDPOINT, records)
+        elif kind in DEVICE_MESSAGES:
+            self._queue(DEVICE_ENDPOINT, records)
+        elif kind == "events":
+            gone = [r["user"] for r in records if r.get("key") in DISCONNECT_EVENTS and r.get("user")]
+            if gone:
+                self._queue(CLIENT_ENDPOINT, [], gone)
+
+    def _queue(self, endpoint: str, records: list[dict[str, Any]], removed: Iterable[str] = ()):
+        """Collect changes until the event loop's next turn (right away outside a loop)"""
+        pending = self._pending.setdefault(endpoint, {})
+        for record in records:
+            mac = normalize_mac(record.get("mac"))
+            if mac:
+                previous = pending.get(mac)
+                pending[mac] = {**previous, **record} if previous else record
+        for mac in removed:
+            mac = normalize_mac(mac)
+            if mac:
+                pending[mac] = None
+
+        if not self._flush_scheduled:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush()
+                return
+            self._flush_scheduled = True
+            loop.call_soon(self.flush)
+
+    def flush(self):
+        """Apply the queued changes, one new snapshot per endpoint"""
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        for endpoint, changes in pending.items():
+            records = [record for record in changes.values() if record is not None]
+            removed = [mac for mac, record in changes.items() if record is None]
+            self.ctrl.apply_records(endpoint, records, self.site, removed)
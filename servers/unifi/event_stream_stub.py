@@ -0,0 +1,90 @@
+"""
+Local stand-in for the UniFi OS event-stream websocket, for offline testing.
+
+Serves ws://HOST:PORT/proxy/network/wss/s/{site}/events and sends every
+connected consumer either the messages of a recorded JSONL file (one controller
+message per line) or synthetic sta:sync updates and disconnect events for the
+given client MACs. Point the MCP server at it with:
+
+    UNIFI_EVENTS=1 UNIFI_EVENTS_URL=ws://127.0.0.1:8765/proxy/network/wss/s/default/events
+
+Usage:
+    python event_stream_stub.py --macs aa:bb:cc:00:00:01,aa:bb:cc:00:00:02
+    python event_stream_stub.py --replay recorded_events.jsonl --interval 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+
+try:
+    from websockets.asyncio.server import serve
+except ImportError:
+    print("Error: websockets not installed. Run: pip install websockets", file=sys.stderr)
+    sys.exit(1)
+
+
+def synthetic_messages(macs: list[str], disconnect_every: int = 10):
+    """Endless sta:sync counter updates, with an occasional client disconnect"""
+    counters = {mac: [0, 0] for mac in macs}
+    n = 0
+    while True:
+        n += 1
+        mac = random.choice(macs)
+        if disconnect_every and n % disconnect_every == 0:
+            yield {"meta": {"rc": "ok", "message": "events"},
+                   "data": [{"key": "EVT_WU_Disconnected", "user": mac}]}
+            continue
+        counters[mac][0] += random.randint(1000, 1000000)
+        counters[mac][1] += random.randint(1000, 1000000)
+        yield {"meta": {"rc": "ok", "message": "sta:sync"},
+               "data": [{"mac": mac, "tx_bytes": counters[mac][0], "rx_bytes": counters[mac][1],
+                         "signal": random.randint(-80, -40)}]}
+
+
+def replayed_messages(path: str):
+    """Messages from a JSONL recording, in order"""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in UniFi event-stream websocket server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--site", default="default")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between messages")
+    parser.add_argument("--replay", help="JSONL file of recorded controller messages")
+    parser.add_argument("--macs", default="", help="Comma-separated client MACs for synthetic updates")
+    args = parser.parse_args()
+
+    if not args.replay and not args.macs:
+        parser.error("either --replay or --macs is required")
+    path = f"/proxy/network/wss/s/{args.site}/events"
+
+    async def handler(websocket):
+        if websocket.request.path != path:
+            await websocket.close(code=1008, reason="unknown path")
+            return
+        if args.replay:
+            messages = replayed_messages(args.replay)
+        else:
+            messages = synthetic_messages([mac.strip() for mac in args.macs.split(",") if mac.strip()])
+        for message in messages:
+            await websocket.send(json.dumps(message))
+            await asyncio.sleep(args.interval)
+
+    async def run():
+        async with serve(handler, args.host, args.port) as server:
+            print(f"Serving ws://{args.host}:{args.port}{path}", file=sys.stderr)
+            await server.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
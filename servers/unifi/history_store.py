@@ -0,0 +1,282 @@
+"""
+Embedded SQLite history of UniFi observations.
+
+The recorder appends a compact row per client and per device at a fixed
+interval, plus each alarm once, so historical questions ("when was this client
+last seen", "which AP had the most clients yesterday") are answered with
+indexed SQL instead of an external system. Rows past the retention period are
+deleted, and rows older than a day are thinned to one per MAC per hour.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from snapshot_cache import normalize_mac
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS client_obs (
+    ts INTEGER NOT NULL,
+    site TEXT NOT NULL,
+    mac TEXT NOT NULL,
+    name TEXT,
+    ip TEXT,
+    ap_mac TEXT,
+    essid TEXT,
+    is_wired INTEGER,
+    signal INTEGER,
+    tx_bytes INTEGER,
+    rx_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS client_obs_mac_ts ON client_obs (mac, ts);
+CREATE INDEX IF NOT EXISTS client_obs_ts ON client_obs (ts);
+CREATE INDEX IF NOT EXISTS client_obs_ap_ts ON client_obs (ap_mac, ts);
+
+CREATE TABLE IF NOT EXISTS device_obs (
+    ts INTEGER NOT NULL,
+    site TEXT NOT NULL,
+    mac TEXT NOT NULL,
+    name TEXT,
+    type TEXT,
+    state INTEGER,
+    num_sta INTEGER,
+    tx_bytes INTEGER,
+    rx_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS device_obs_mac_ts ON device_obs (mac, ts);
+CREATE INDEX IF NOT EXISTS device_obs_ts ON device_obs (ts);
+
+CREATE TABLE IF NOT EXISTS alarms (
+    id TEXT PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    site TEXT NOT NULL,
+    key TEXT,
+    msg TEXT,
+    subsystem TEXT,
+    archived INTEGER
+);
+CREATE INDEX IF NOT EXISTS alarms_ts ON alarms (ts);
+"""
+
+
+class HistoryStore:
+    """
+    Append-only observation tables in one SQLite file.
+
+    Each snapshot is written with a single executemany in one transaction.
+    Calls are serialized on one connection, so the store can be used from
+    worker threads (see HistoryRecorder).
+    """
+
+    def __init__(self, path: str, retention_days: float = 30.0, compact_after_hours: float = 24.0):
+        self.path = Path(path).expanduser()
+        self.retention_days = retention_days
+        self.compact_after_hours = compact_after_hours
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Close the database"""
+        with self._lock:
+            self._db.close()
+
+    def record_clients(self, site: str, clients: list[dict[str, Any]], ts: Optional[int] = None) -> int:
+        """Append one row per client; returns the number of rows written"""
+        ts = int(time.time()) if ts is None else ts
+        rows = [
+            (ts, site, normalize_mac(c["mac"]), c.get("name") or c.get("hostname"), c.get("ip"),
+             normalize_mac(c.get("ap_mac")) or None, c.get("essid"), int(bool(c.get("is_wired"))),
+             c.get("signal"), c.get("tx_bytes"), c.get("rx_bytes"))
+            for c in clients if c.get("mac")
+        ]
+        with self._lock, self._db:
+            self._db.executemany("INSERT INTO client_obs VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows)
+        return len(rows)
+
+    def record_devices(self, site: str, devices: list[dict[str, Any]], ts: Optional[int] = None) -> int:
+        """Append one row per device; returns the number of rows written"""
+        ts = int(time.time()) if ts is None else ts
+        rows = [
+            (ts, site, normalize_mac(d["mac"]), d.get("name"), d.get("type"), d.get("state"),
+             d.get("num_sta"), d.get("tx_bytes"), d.get("rx_bytes"))
+            for d in devices if d.get("mac")
+        ]
+        with self._lock, self._db:
+            self._db.executemany("INSERT INTO device_obs VALUES (?,?,?,?,?,?,?,?,?)", rows)
+        return len(rows)
+
+    def record_alarms(self, site: str, alarms: list[dict[str, Any]]) -> int:
+        """Insert alarms not stored yet; returns the number of new rows"""
+        rows = [
+            (a["_id"], int(a.get("datetime", 0) // 1000), site, a.get("key"), a.get("msg"),
+             a.get("subsystem"), int(bool(a.get("archived"))))
+            for a in alarms if a.get("_id")
+        ]
+        with self._lock, self._db:
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO alarms VALUES (?,?,?,?,?,?,?)", rows)
+            return self._db.total_changes - before
+
+    def compact(self, now: Optional[float] = None) -> dict[str, int]:
+        """
+        Apply retention and thin old observations.
+
+        Rows older than retention_days are deleted. Observations older than
+        compact_after_hours are reduced to the first one per MAC per hour,
+        which keeps "last seen" and per-hour questions answerable.
+        """
+        now = time.time() if now is None else now
+        expire = int(now - self.retention_days * 86400)
+        thin = int(now - self.compact_after_hours * 3600)
+        deleted = {}
+        with self._lock, self._db:
+            for table in ("client_obs", "device_obs"):
+                cursor = self._db.execute(f"DELETE FROM {table} WHERE ts < ?", (expire,))
+                removed = cursor.rowcount
+                cursor = self._db.execute(
+                    f"DELETE FROM {table} WHERE ts < ? AND rowid NOT IN ("
+                    f"SELECT MIN(rowid) FROM {table} WHERE ts < ? GROUP BY mac, ts / 3600)",
+                    (thin, thin),
+                )
+                deleted[table] = removed + cursor.rowcount
+            deleted["alarms"] = self._db.execute("DELETE FROM alarms WHERE ts < ?", (expire,)).rowcount
+        with self._lock:
+            self._db.execute("PRAGMA optimize")
+        return deleted
+
+    def _query(self, sql: str, params: tuple = ()) -> list[dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params)]
+
+    def client_history(self, mac: str, since: int, limit: int = 100) -> dict[str, Any]:
+        """First/last sighting of a client overall plus its newest observations since a time"""
+        mac = normalize_mac(mac)
+        summary = self._query(
+            "SELECT MIN(ts) AS first_seen, MAX(ts) AS last_seen, COUNT(*) AS observations "
+            "FROM client_obs WHERE mac = ?", (mac,)
+        )[0]
+        rows = self._query(
+            "SELECT ts, name, ip, ap_mac, essid, signal, tx_bytes, rx_bytes FROM client_obs "
+            "WHERE mac = ? AND ts >= ? ORDER BY ts DESC LIMIT ?", (mac, since, limit)
+        )
+        return {**summary, "rows": rows}
+
+    def ap_client_counts(self, since: int, until: int, limit: int = 20) -> list[dict[str, Any]]:
+        """Distinct and peak simultaneous clients per AP between two times, busiest first"""
+        return self._query(
+            "SELECT o.ap_mac, (SELECT name FROM device_obs d WHERE d.mac = o.ap_mac ORDER BY ts DESC LIMIT 1) AS name, "
+            "COUNT(DISTINCT o.mac) AS distinct_clients, "
+            "(SELECT MAX(n) FROM (SELECT COUNT(*) AS n FROM client_obs p "
+            " WHERE p.ap_mac = o.ap_mac AND p.ts >= ? AND p.ts < ? GROUP BY p.ts)) AS peak_clients "
+            "FROM client_obs o WHERE o.ap_mac IS NOT NULL AND o.ts >= ? AND o.ts < ? "
+            "GROUP BY o.ap_mac ORDER BY distinct_clients DESC LIMIT ?",
+            (since, until, since, until, limit),
+        )
+
+    def alarms(self, since: int, key: Optional[str] = None, limit: int = 100) -> list[dict[str, Any]]:
+        """Stored alarms since a time, newest first"""
+        if key:
+            return self._query(
+                "SELECT ts, site, key, msg, subsystem, archived FROM alarms "
+                "WHERE ts >= ? AND key = ? ORDER BY ts DESC LIMIT ?", (since, key, limit)
+            )
+        return self._query(
+            "SELECT ts, site, key, msg, subsystem, archived FROM alarms "
+            "WHERE ts >= ? ORDER BY ts DESC LIMIT ?", (since, limit)
+        )
+
+    def newest_alarm(self, site: str) -> Optional[int]:
+        """Time (epoch seconds) of the newest stored alarm of a site, or None if there are none"""
+        return self._query("SELECT MAX(ts) AS ts FROM alarms WHERE site = ?", (site,))[0]["ts"]
+
+    def stats(self) -> dict[str, Any]:
+        """Row counts and covered time range"""
+        counts = {}
+        for table in ("client_obs", "device_obs", "alarms"):
+            counts[table] = self._query(f"SELECT COUNT(*) AS n, MIN(ts) AS oldest, MAX(ts) AS newest FROM {table}")[0]
+        return counts
+
+
+class HistoryRecorder:
+    """
+    Periodically appends a controller's clients, devices and new alarms to a HistoryStore.
+
+    Reads go through the controller's snapshot cache, so recording does not add
+    fetches when other tools or the stats poller refreshed the lists recently.
+    SQLite work runs in a worker thread to keep the event loop responsive.
+    """
+
+    def __init__(self, ctrl, store: HistoryStore, interval: float = 300.0,
+                 compact_interval: float = 3600.0):
+        self.ctrl = ctrl
+        self.store = store
+        self.interval = interval
+        self.compact_interval = compact_interval
+        self.last_record: Optional[float] = None
+        self.last_compact: Optional[float] = None
+        self.last_error: Optional[str] = None
+        # Newest alarm datetime (ms) already stored. Seeded from the store so a restart doesn't
+        # re-download every alarm; alarms are stored per second, so that second is read again
+        # (already stored ones are ignored)
+        newest = store.newest_alarm(ctrl.site_id)
+        self._alarm_cursor: Optional[int] = newest * 1000 - 1 if newest is not None else None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start recording in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop recording and close the store"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.store.close()
+
+    async def record_once(self):
+        """Append one observation of every client and device, and any new alarms"""
+        site = self.ctrl.site_id
+        clients, devices, alarms = await asyncio.gather(
+            self.ctrl.get_clients(max_age=self.interval),
+            self.ctrl.get_aps(max_age=self.interval),
+            # No limit on purpose: every alarm after the cursor is stored before it advances.
+            # With nothing stored yet, only alarms within the retention period are worth fetching
+            self.ctrl.get_alarms(
+                newer_than=self._alarm_cursor,
+                within_hours=self.store.retention_days * 24 if self._alarm_cursor is None else None,
+            ),
+        )
+        ts = int(time.time())
+        await asyncio.to_thread(self.store.record_clients, site, clients, ts)
+        await asyncio.to_thread(self.store.record_devices, site, devices, ts)
+        await asyncio.to_thread(self.store.record_alarms, site, alarms)
+        if alarms:
+            newest = max(alarm.get("datetime", 0) for alarm in alarms)
+            self._alarm_cursor = max(newest, self._alarm_cursor or 0)
+        self.last_record = time.time()
+
+        if self.last_compact is None or self.last_record - self.last_compact >= self.compact_interval:
+            await asyncio.to_thread(self.store.compact)
+            self.last_compact = self.last_record
+
+    async def _run(self):
+        while True:
+            try:
+                await self.record_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,125 @@
+"""
+Incremental decoder for UniFi API responses.
+
+Controller responses look like {"meta": {...}, "data": [record, ...]}. Instead of
+holding the raw body, the decoded text and the whole object graph at once, the
+decoder is fed text chunks as they arrive and hands back each record of the
+"data" array as soon as it is complete, optionally trimmed to the fields the
+caller needs.
+"""
+
+import json
+from typing import Any, Iterable, Optional
+
+_WHITESPACE = " \t\n\r"
+
+
+class DataArrayDecoder:
+    """
+    Streams the records of the top-level "data" array out of a JSON response.
+
+    Other top-level keys (such as "meta") are decoded and discarded. Only the
+    unconsumed tail of the input is buffered between feed() calls.
+    """
+
+    def __init__(self, fields: Optional[Iterable[str]] = None, key: str = "data"):
+        self.fields = tuple(fields) if fields is not None else None
+        self.key = key
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._state = "start"
+        self._current_key: Optional[str] = None
+
+    def feed(self, chunk: str) -> list[dict[str, Any]]:
+        """Consume a chunk of text and return the records it completed"""
+        self._buffer += chunk
+        return self._drain(final=False)
+
+    def close(self) -> list[dict[str, Any]]:
+        """Finish decoding; raises ValueError if the response was truncated"""
+        records = self._drain(final=True)
+        if self._state != "done":
+            raise ValueError("Truncated JSON response from controller")
+        return records
+
+    def _project(self, record: Any) -> Any:
+        if self.fields is None or not isinstance(record, dict):
+            return record
+        return {name: record[name] for name in self.fields if name in record}
+
+    def _decode(self, pos: int, final: bool) -> Optional[tuple[Any, int]]:
+        """Decode one value at pos, or None if the buffer doesn't hold all of it yet"""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise ValueError("Malformed JSON response from controller")
+            return None
+        if end == len(self._buffer) and not final:
+            return None  # A number may continue in the next chunk
+        return value, end
+
+    def _drain(self, final: bool) -> list[dict[str, Any]]:
+        records = []
+        buffer = self._buffer
+        pos = 0
+        size = len(buffer)
+
+        while True:
+            while pos < size and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= size or self._state == "done":
+                break
+            char = buffer[pos]
+
+            if self._state == "start":
+                if char != "{":
+                    raise ValueError("Expected a JSON object from controller")
+                self._state = "key"
+                pos += 1
+
+            elif self._state == "key":
+                if char == "}":
+                    self._state = "done"
+                    pos += 1
+                elif char == ",":
+                    pos += 1
+                else:
+                    decoded = self._decode(pos, final)
+                    if decoded is None:
+                        break
+                    self._current_key, pos = decoded
+                    self._state = "colon"
+
+            elif self._state == "colon":
+                if char != ":":
+                    raise ValueError("Malformed JSON response from controller")
+                self._state = "value"
+                pos += 1
+
+            elif self._state == "value":
+                if self._current_key == self.key and char == "[":
+                    self._state = "items"
+                    pos += 1
+                else:
+                    decoded = self._decode(pos, final)
+                    if decoded is None:
+                        break
+                    _, pos = decoded
+                    self._state = "key"
+
+            elif self._state == "items":
+                if char == "]":
+                    self._state = "key"
+                    pos += 1
+                elif char == ",":
+                    pos += 1
+                else:
+                    decoded = self._decode(pos, final)
+                    if decoded is None:
+                        break
+                    record, pos = decoded
+                    records.append(self._project(record))
+
+        self._buffer = buffer[pos:]
+        return records
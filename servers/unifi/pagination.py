@@ -0,0 +1,83 @@
+"""
+Cursor pagination over pinned snapshots.
+
+The first page pins the snapshot it was cut from and sorts its (filtered)
+records once; the sorted order is memoized on the snapshot. A cursor names the
+snapshot id, the offset of the next page and the listing's filter and sort, so
+every later page is a slice of the same order. Pages stay consistent even if
+newer data has been fetched in the meantime, and no page re-fetches. Snapshot
+ids restart in every process, so cursors also carry a per-process nonce.
+"""
+
+import base64
+import ipaddress
+import json
+import secrets
+from typing import Any, Callable, Hashable
+
+from snapshot_cache import Snapshot
+
+# Tells this process's cursors apart from those of earlier runs
+_PROCESS_NONCE = secrets.token_hex(4)
+
+
+def encode_cursor(snapshot_id: int, offset: int, **listing: Any) -> str:
+    """Opaque cursor for the page starting at offset of a pinned snapshot's listing"""
+    payload = json.dumps({"p": _PROCESS_NONCE, "s": snapshot_id, "o": offset, **listing}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """Snapshot id ("s"), offset ("o") and listing parameters of a cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload.get("s"), int) or not isinstance(payload.get("o"), int):
+            raise ValueError
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid cursor; list again without a cursor to start over")
+    if payload.get("p") != _PROCESS_NONCE:
+        raise ValueError("Cursor is from before the server restarted; list again without a cursor to start over")
+    return payload
+
+
+def _ip_key(value: str) -> tuple[int, int]:
+    """IPs in numeric order (10.0.0.9 before 10.0.0.10), unparsable ones last"""
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return 7, 0
+    return address.version, int(address)
+
+
+def sort_key(field: str, value: Callable[[Any], Any]) -> Callable[[Any], tuple]:
+    """Total order for records by one field: missing values last, ties broken by MAC"""
+    if field == "ip":
+        def key(record):
+            v = value(record)
+            return (v is None, _ip_key(v) if v is not None else (0, 0), record.get("mac") or "")
+    else:
+        def key(record):
+            v = value(record)
+            if isinstance(v, str):
+                v = v.lower()
+            return (v is None, v if v is not None else 0, record.get("mac") or "")
+    return key
+
+
+def page_order(snapshot: Snapshot, name: Hashable, select: Callable[[list[Any]], list[Any]],
+               key: Callable[[Any], tuple], descending: bool = False) -> list[Any]:
+    """
+    Selected records of a snapshot in sort order, memoized under name.
+
+    Descending order reverses the values but keeps missing values last.
+    """
+    def build():
+        records = select(snapshot.data)
+        keys = list(map(key, records))  # Each key computed once, not once per comparison
+        order = sorted(range(len(records)), key=keys.__getitem__, reverse=descending)
+        if descending:
+            order = [i for i in order if not keys[i][0]] + [i for i in order if keys[i][0]]
+        return [records[i] for i in order]
+
+    return snapshot.memo(("page_order", name, descending), build)
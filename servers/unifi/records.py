@@ -0,0 +1,99 @@
+"""
+Compact record types for cached devices and clients.
+
+The controller returns each device and client as a dict with hundreds of keys.
+Snapshots instead hold one slotted object per record with just the fields the
+tools and indexes use, built once when the snapshot is fetched. Records keep a
+read-only dict-style get() so code that handles both records and plain
+controller dicts (alarms, health) reads them the same way.
+"""
+
+from typing import Any
+
+# Fields of each cached list the tools format; everything else is dropped while
+# the response is decoded, which keeps large sites' snapshots small
+DEVICE_FIELDS = (
+    "name", "mac", "model", "type", "ip", "state", "adopted", "uptime", "version",
+    "num_sta", "user-num_sta", "guest-num_sta", "satisfaction",
+    "bytes", "tx_bytes", "rx_bytes", "uplink", "radio_table", "radio_table_stats",
+)
+CLIENT_FIELDS = (
+    "name", "hostname", "mac", "ip", "is_wired", "ap_mac", "essid", "channel",
+    "radio", "signal", "uptime", "tx_bytes", "rx_bytes", "vlan",
+)
+
+
+def _attribute(name: str) -> str:
+    """Python attribute for a controller field ("user-num_sta" -> "user_num_sta")"""
+    return name.replace("-", "_")
+
+
+class Record:
+    """
+    Fixed set of controller fields stored in slots.
+
+    A field the controller omitted is None; get() then returns the default,
+    like dict.get() for a missing key.
+    """
+
+    __slots__ = ()
+    FIELDS: tuple[str, ...] = ()
+    _ATTRIBUTES: dict[str, str] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._ATTRIBUTES = {name: _attribute(name) for name in cls.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]):
+        """Build a record from a controller dict, ignoring fields not in FIELDS"""
+        record = cls.__new__(cls)
+        for name, attribute in cls._ATTRIBUTES.items():
+            setattr(record, attribute, data.get(name))
+        return record
+
+    def merged(self, update: dict[str, Any]):
+        """Copy of the record with the fields present in a (partial) controller dict replaced"""
+        record = self.__class__.__new__(self.__class__)
+        for name, attribute in self._ATTRIBUTES.items():
+            setattr(record, attribute, update[name] if name in update else getattr(self, attribute))
+        return record
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Field value by controller name, or default if unset"""
+        attribute = self._ATTRIBUTES.get(name)
+        if attribute is None:
+            return default
+        value = getattr(self, attribute)
+        return default if value is None else value
+
+    def __getitem__(self, name: str) -> Any:
+        attribute = self._ATTRIBUTES.get(name)
+        if attribute is None:
+            raise KeyError(name)
+        return getattr(self, attribute)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Fields that are set, keyed by controller name"""
+        return {name: value for name, attribute in self._ATTRIBUTES.items()
+                if (value := getattr(self, attribute)) is not None}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+
+class Device(Record):
+    """An adopted device (AP, switch or gateway) from /stat/device"""
+
+    FIELDS = DEVICE_FIELDS
+    __slots__ = tuple(_attribute(name) for name in FIELDS)
+
+
+class Client(Record):
+    """A connected client from /stat/sta"""
+
+    FIELDS = CLIENT_FIELDS
+    __slots__ = tuple(_attribute(name) for name in FIELDS)
@@ -0,0 +1,159 @@
+"""
+On-disk cache of the controller's historical report rollups.
+
+/stat/report/<interval>.<type> returns one row per finished (or current)
+5-minute, hourly or daily bucket. A bucket's numbers never change once it has
+ended and the controller has rolled it up, so each fetched row is kept in
+SQLite and the time range it was fetched for is recorded as covered up to the
+last finished bucket. A later query only asks the controller for the parts of
+its range that are not covered yet, which is normally just the current bucket.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+# Bucket length in seconds per report interval
+REPORT_INTERVALS = {"5minutes": 300, "hourly": 3600, "daily": 86400}
+
+# Report types and the field that names the object of each row
+REPORT_TYPES = {"site": None, "ap": "ap", "user": "user"}
+
+# Fields requested when the caller names none ("time" is always added)
+DEFAULT_REPORT_ATTRS = {
+    "site": ("bytes", "wan-tx_bytes", "wan-rx_bytes", "wlan_bytes", "num_sta", "lan-num_sta", "wlan-num_sta"),
+    "ap": ("bytes", "num_sta"),
+    "user": ("rx_bytes", "tx_bytes"),
+}
+
+# The controller rolls a bucket up a few minutes after it ends; until then it may still change
+SETTLE_SECONDS = 900
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS report_rows (
+    query TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    object TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (query, time, object)
+);
+
+CREATE TABLE IF NOT EXISTS report_coverage (
+    query TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS report_coverage_query ON report_coverage (query);
+"""
+
+
+def default_report_cache_path(host: str, port: int) -> Path:
+    """Where report rollups fetched from a controller are cached between processes"""
+    return Path.home() / ".cache" / "unifi-mcp" / f"reports-{host}-{port}.db"
+
+
+def report_query_key(site: str, interval: str, report_type: str, attrs: Iterable[str],
+                     macs: Optional[Iterable[str]] = None) -> str:
+    """Cache key of a report query; rows fetched for one key never answer another"""
+    return json.dumps([site, interval, report_type, sorted(attrs), sorted(macs or [])], separators=(",", ":"))
+
+
+class ReportCache:
+    """
+    Report rows and the time ranges they cover, per query, in one SQLite file.
+
+    Times are controller milliseconds. Calls are serialized on one connection,
+    so the cache can be used from worker threads.
+    """
+
+    def __init__(self, path: str, settle_seconds: float = SETTLE_SECONDS):
+        self.path = Path(path).expanduser()
+        self.settle_seconds = settle_seconds
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Close the database"""
+        with self._lock:
+            self._db.close()
+
+    def _coverage(self, query: str) -> list[tuple[int, int]]:
+        return self._db.execute(
+            "SELECT start, end FROM report_coverage WHERE query = ? ORDER BY start", (query,)
+        ).fetchall()
+
+    def missing(self, query: str, start: int, end: int) -> list[tuple[int, int]]:
+        """Sub-ranges of [start, end] the cache can't answer, to fetch from the controller"""
+        with self._lock:
+            covered = self._coverage(query)
+
+        gaps = []
+        cursor = start
+        for low, high in covered:
+            if high <= cursor:
+                continue
+            if low > end:
+                break
+            if low > cursor:
+                gaps.append((cursor, low - 1))
+            cursor = max(cursor, high)
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def store(self, query: str, interval: str, start: int, end: int,
+              rows: list[dict[str, Any]], now: Optional[float] = None) -> int:
+        """
+        Save the rows fetched for [start, end] and mark finished buckets as covered.
+
+        Rows of buckets that haven't settled yet are saved too but stay
+        uncovered, so the next query fetches them again. Returns the number of
+        rows saved.
+        """
+        now = time.time() if now is None else now
+        object_field = REPORT_TYPES.get(json.loads(query)[2])
+        # Buckets starting before this have ended and been rolled up
+        final_before = int((now - REPORT_INTERVALS[interval] - self.settle_seconds) * 1000)
+
+        values = [
+            (query, int(row["time"]), str(row.get(object_field) or "") if object_field else "",
+             json.dumps(row, separators=(",", ":")))
+            for row in rows if "time" in row and start <= row["time"] <= end
+        ]
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM report_rows WHERE query = ? AND time >= ? AND time <= ?",
+                             (query, start, end))
+            self._db.executemany("INSERT OR REPLACE INTO report_rows VALUES (?,?,?,?)", values)
+
+            # Coverage ranges are half-open: [start, end + 1) covers the fetched range itself
+            covered_end = min(end + 1, final_before)
+            if covered_end > start:
+                # Merge with overlapping or adjacent ranges so coverage stays a short list
+                ranges = self._coverage(query) + [(start, covered_end)]
+                ranges.sort()
+                merged = [list(ranges[0])]
+                for low, high in ranges[1:]:
+                    if low <= merged[-1][1]:
+                        merged[-1][1] = max(merged[-1][1], high)
+                    else:
+                        merged.append([low, high])
+                self._db.execute("DELETE FROM report_coverage WHERE query = ?", (query,))
+                self._db.executemany("INSERT INTO report_coverage VALUES (?,?,?)",
+                                     [(query, low, high) for low, high in merged])
+        return len(values)
+
+    def rows(self, query: str, start: int, end: int) -> list[dict[str, Any]]:
+        """Cached rows in [start, end], oldest first"""
+        with self._lock:
+            cursor = self._db.execute(
+                "SELECT data FROM report_rows WHERE query = ? AND time >= ? AND time <= ? ORDER BY time, object",
+                (query, start, end),
+            )
+            return [json.loads(data) for (data,) in cursor]
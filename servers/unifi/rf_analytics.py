@@ -0,0 +1,149 @@
+"""
+Radio and channel utilization from the cached device list.
+
+Every AP reports a radio_table (configured channel, width, power) and a
+radio_table_stats (channel utilization, retries, clients) per radio. Both are
+flattened once per device snapshot into one row per radio with its occupied
+spectrum as a frequency interval. Co-channel overlap then comes from two sorted
+arrays of interval edges: the radios overlapping [low, high) are those starting
+below high minus those ending at or below low, two binary searches per radio
+instead of comparing every pair of APs.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Optional
+
+from snapshot_cache import Snapshot
+
+# Controller radio codes and the band each one is in
+BANDS = {"ng": "2g", "na": "5g", "6e": "6g"}
+
+RADIO_COLUMNS = (
+    "ap_mac", "ap_name", "radio", "band", "channel", "width", "tx_power",
+    "utilization", "self_tx", "self_rx", "interference", "clients",
+    "tx_packets", "tx_retries", "retry_ratio", "overlapping",
+)
+CHANNEL_COLUMNS = (
+    "band", "channel", "radios", "ap_names", "clients", "utilization_mean", "utilization_max",
+    "retry_ratio", "overlapping",
+)
+
+
+def _spectrum(band: str, channel: int, width: int) -> Optional[tuple[int, int]]:
+    """Occupied frequency range in MHz of a radio, or None for an unknown band"""
+    if band == "2g":
+        # 20 MHz channels spill 1 MHz past each edge; wider 2.4 GHz widths assumed centred
+        center = 2484 if channel == 14 else 2407 + 5 * channel
+        half = max(width, 20) // 2 + 1
+        return center - half, center + half
+    if band == "5g":
+        center, base = 5000 + 5 * channel, 5170
+        if center >= 5735:  # UNII-3 blocks are aligned on channel 149
+            base = 5735
+    elif band == "6g":
+        center, base = 5950 + 5 * channel, 5945
+    else:
+        return None
+    # Bonded channels occupy the width-aligned block that contains the primary
+    width = max(width, 20)
+    low = base + (center - 10 - base) // width * width
+    return low, low + width
+
+
+class RadioTable:
+    """One row per AP radio in RADIO_COLUMNS order, with the overlap column filled in"""
+
+    __slots__ = ("rows", "spans")
+
+    def __init__(self, devices: list[Any]):
+        self.rows: list[list[Any]] = []
+        self.spans: list[Optional[tuple[str, int, int]]] = []
+
+        for device in devices:
+            stats_list = device.get("radio_table_stats")
+            if not stats_list:
+                continue
+            configured = {radio.get("name"): radio for radio in device.get("radio_table") or []}
+            for stats in stats_list:
+                config = configured.get(stats.get("name"), {})
+                code = stats.get("radio") or config.get("radio")
+                band = BANDS.get(code, code)
+                channel = stats.get("channel") or config.get("channel")
+                width = config.get("ht")
+                try:
+                    width = int(width) if width is not None else 20
+                except (TypeError, ValueError):
+                    width = 20  # Older firmware reports e.g. "HT40" strings
+
+                utilization = stats.get("cu_total")
+                self_tx = stats.get("cu_self_tx")
+                self_rx = stats.get("cu_self_rx")
+                interference = None
+                if utilization is not None and (self_tx is not None or self_rx is not None):
+                    interference = max(utilization - (self_tx or 0) - (self_rx or 0), 0)
+                packets = stats.get("tx_packets")
+                retries = stats.get("tx_retries")
+
+                self.rows.append([
+                    device.get("mac"), device.get("name"), code, band, channel, width,
+                    stats.get("tx_power", config.get("tx_power")),
+                    utilization, self_tx, self_rx, interference, stats.get("num_sta"),
+                    packets, retries, round(retries / packets, 4) if packets and retries is not None else None,
+                    None,
+                ])
+                span = _spectrum(band, channel, width) if isinstance(channel, int) else None
+                self.spans.append((band, *span) if span else None)
+
+        self._count_overlaps()
+
+    def _count_overlaps(self):
+        edges: dict[str, tuple[list[int], list[int]]] = {}
+        for span in self.spans:
+            if span is not None:
+                lows, highs = edges.setdefault(span[0], ([], []))
+                lows.append(span[1])
+                highs.append(span[2])
+        for lows, highs in edges.values():
+            lows.sort()
+            highs.sort()
+
+        overlapping = RADIO_COLUMNS.index("overlapping")
+        for row, span in zip(self.rows, self.spans):
+            if span is None:
+                continue
+            band, low, high = span
+            lows, highs = edges[band]
+            # Radios starting below our top edge, minus those already ended by our bottom edge, minus ourselves
+            row[overlapping] = bisect_left(lows, high) - bisect_right(highs, low) - 1
+
+
+def radio_table(snapshot: Snapshot) -> RadioTable:
+    """Radio rows of a device snapshot (built once per snapshot)"""
+    return snapshot.memo("radio_table", lambda: RadioTable(snapshot.data))
+
+
+def channel_rows(table: RadioTable, band: Optional[str] = None) -> list[list[Any]]:
+    """One row per (band, primary channel) in CHANNEL_COLUMNS order, most radios first"""
+    col = {name: i for i, name in enumerate(RADIO_COLUMNS)}
+    groups: dict[tuple[str, Any], list[list[Any]]] = {}
+    for row in table.rows:
+        if band is None or row[col["band"]] == band:
+            groups.setdefault((row[col["band"]], row[col["channel"]]), []).append(row)
+
+    rows = []
+    for (row_band, channel), radios in groups.items():
+        utilization = [r[col["utilization"]] for r in radios if r[col["utilization"]] is not None]
+        packets = sum(r[col["tx_packets"]] or 0 for r in radios)
+        retries = sum(r[col["tx_retries"]] or 0 for r in radios)
+        overlaps = [r[col["overlapping"]] for r in radios if r[col["overlapping"]] is not None]
+        rows.append([
+            row_band, channel, len(radios),
+            [r[col["ap_name"]] or r[col["ap_mac"]] for r in radios],
+            sum(r[col["clients"]] or 0 for r in radios),
+            round(sum(utilization) / len(utilization), 1) if utilization else None,
+            max(utilization) if utilization else None,
+            round(retries / packets, 4) if packets else None,
+            max(overlaps) if overlaps else None,
+        ])
+    rows.sort(key=lambda row: (-row[2], str(row[0]), str(row[1])))
+    return rows
@@ -0,0 +1,199 @@
+"""
+Prefix, substring and fuzzy search over client names, hostnames, IPs and MACs.
+
+Every searchable value of a client is lowercased into a term. Terms live in a
+sorted array, so all terms starting with a prefix form one contiguous range
+found by binary search. Each term is also split into trigrams with postings to
+the clients that contain them: intersecting postings finds substrings (MAC
+fragments, the middle of a hostname), and counting shared trigrams ranks
+near-misses. When a new snapshot arrives only clients whose searchable fields
+changed are re-indexed.
+"""
+
+import heapq
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+from snapshot_cache import Snapshot
+
+SEARCH_FIELDS = ("name", "hostname", "ip")  # Plus the MAC, with and without separators
+
+# A query made only of hex digits and MAC separators is also tried without separators
+_MAC_FRAGMENT = re.compile(r"[0-9a-f]+([:.\-][0-9a-f]+)*[:.\-]?")
+
+
+def _trigrams(term: str) -> set[str]:
+    """Trigrams of a term padded like pg_trgm, so short terms and word edges count"""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _indexed_trigrams(term: str, field: str) -> set[str]:
+    """Trigrams posted for a term (the separator-free MAC term covers the MAC)"""
+    if field == "mac" and ":" in term:
+        return set()
+    return _trigrams(term)
+
+
+def _similarity(a: set[str], b: set[str]) -> float:
+    return len(a & b) / len(a | b)
+
+
+class ClientSearchIndex:
+    """
+    Search index over one site's clients, updated incrementally per snapshot.
+
+    Matches rank exact (1.0), then prefix (0.9), then substring (0.7), then
+    fuzzy trigram similarity (scaled below 0.6).
+    """
+
+    def __init__(self, min_similarity: float = 0.3, common_trigram_share: float = 0.1):
+        self.min_similarity = min_similarity
+        # Trigrams in more than this share of clients are too common to seed fuzzy candidates
+        self.common_trigram_share = common_trigram_share
+        self._sorted: list[tuple[str, str, str]] = []  # (term, mac, field)
+        self._values: dict[str, tuple] = {}  # mac -> raw searchable values, to spot changes
+        self._terms: dict[str, tuple[tuple[str, str], ...]] = {}  # mac -> ((term, field), ...)
+        self._postings: dict[str, set[str]] = {}  # trigram -> macs
+        self._records: dict[str, Any] = {}
+        self._snapshot: Optional[Snapshot] = None
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    @staticmethod
+    def _record_terms(mac: str, values: tuple) -> tuple[tuple[str, str], ...]:
+        terms = [(str(value).lower(), name) for name, value in zip(SEARCH_FIELDS, values) if value]
+        terms.append((mac, "mac"))
+        terms.append((mac.replace(":", ""), "mac"))
+        return tuple(dict.fromkeys(terms))
+
+    def update(self, snapshot: Snapshot):
+        """Bring the index in line with a snapshot, re-indexing only changed clients"""
+        if snapshot is self._snapshot:
+            return
+        self._snapshot = snapshot
+
+        current = snapshot.by_mac
+        changed = {}
+        for mac, record in current.items():
+            values = (record.get("name"), record.get("hostname"), record.get("ip"))
+            if self._values.get(mac) != values:
+                self._values[mac] = values
+                changed[mac] = self._record_terms(mac, values)
+        removed = [mac for mac in self._terms if mac not in current]
+        for mac in removed:
+            del self._values[mac]
+        self._records = current
+
+        # Many changes (or the first snapshot): sorting once beats many insertions
+        if len(changed) + len(removed) > max(64, len(self._terms) // 8):
+            for mac in removed:
+                del self._terms[mac]
+            self._terms.update(changed)
+            self._rebuild()
+            return
+
+        for mac in removed:
+            self._remove(mac)
+        for mac, terms in changed.items():
+            self._remove(mac)
+            self._add(mac, terms)
+
+    def _rebuild(self):
+        self._sorted = sorted((term, mac, name) for mac, terms in self._terms.items() for term, name in terms)
+        self._postings = {}
+        for mac, terms in self._terms.items():
+            for term, name in terms:
+                for trigram in _indexed_trigrams(term, name):
+                    self._postings.setdefault(trigram, set()).add(mac)
+
+    def _add(self, mac: str, terms: tuple[tuple[str, str], ...]):
+        self._terms[mac] = terms
+        for term, name in terms:
+            insort(self._sorted, (term, mac, name))
+            for trigram in _indexed_trigrams(term, name):
+                self._postings.setdefault(trigram, set()).add(mac)
+
+    def _remove(self, mac: str):
+        terms = self._terms.pop(mac, None)
+        if not terms:
+            return
+        for term, name in terms:
+            i = bisect_left(self._sorted, (term, mac, name))
+            if i < len(self._sorted) and self._sorted[i] == (term, mac, name):
+                del self._sorted[i]
+            for trigram in _indexed_trigrams(term, name):
+                macs = self._postings.get(trigram)
+                if macs is not None:
+                    macs.discard(mac)
+                    if not macs:
+                        del self._postings[trigram]
+
+    def _prefix(self, prefix: str) -> Iterable[tuple[str, str, str]]:
+        i = bisect_left(self._sorted, (prefix,))
+        while i < len(self._sorted) and self._sorted[i][0].startswith(prefix):
+            yield self._sorted[i]
+            i += 1
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> list[tuple[float, str, Any]]:
+        """Best matches as (score, matched field, record), highest score first"""
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        variants = [query]
+        if _MAC_FRAGMENT.fullmatch(query):
+            compact = re.sub(r"[:.\-]", "", query)
+            if compact != query:
+                variants.append(compact)
+
+        best: dict[str, tuple[float, str]] = {}
+
+        def offer(mac: str, score: float, field: str):
+            if score > best.get(mac, (0.0, ""))[0]:
+                best[mac] = (score, field)
+
+        for variant in variants:
+            # Exact terms sort first in the prefix range; past limit matches the rest can't rank higher
+            for term, mac, field in self._prefix(variant):
+                if len(best) >= limit and term != variant:
+                    break
+                offer(mac, 1.0 if term == variant else 0.9, field)
+
+        if len(best) < limit:
+            for variant in variants:
+                if len(variant) < 3:
+                    continue
+                # Substring: every trigram of the query must occur in the term
+                inner = {variant[i:i + 3] for i in range(len(variant) - 2)}
+                postings = sorted((self._postings.get(t, set()) for t in inner), key=len)
+                for mac in set.intersection(*postings):
+                    if mac in best:
+                        continue
+                    for term, field in self._terms[mac]:
+                        if variant in term:
+                            offer(mac, 0.7, field)
+                            break
+
+        if fuzzy and len(best) < limit:
+            query_trigrams = _trigrams(query)
+            common = max(1, int(len(self._terms) * self.common_trigram_share))
+            counts = Counter()
+            for trigram in query_trigrams:
+                macs = self._postings.get(trigram)
+                if macs and len(macs) <= common:
+                    counts.update(macs)
+            # Verify only the clients sharing the most distinctive trigrams
+            for mac, _ in counts.most_common(20 * limit):
+                if mac in best:
+                    continue
+                for term, field in self._terms[mac]:
+                    similarity = _similarity(query_trigrams, _trigrams(term))
+                    if similarity >= self.min_similarity:
+                        offer(mac, round(0.6 * similarity, 3), field)
+
+        ranked = heapq.nsmallest(limit, best.items(), key=lambda item: -item[1][0])
+        return [(score, field, self._records[mac]) for mac, (score, field) in ranked]
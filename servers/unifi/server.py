@@ -5,9 +5,15 @@ Unifi Network MCP Server
 Provides Claude Code with tools to monitor and manage Ubiquiti Unifi networks.
 """
 
+import asyncio
+import heapq
+import json
 import os
+import sqlite3
 import sys
-from typing import Any, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
 from datetime import datetime
 from pathlib import Path
 
@@ -27,220 +33,833 @@ except ImportError:
     sys.exit(1)
 
 try:
-    from unifi_os_controller import UniFiOSController
-except ImportError:
-    print("Error: unifi_os_controller module not found", file=sys.stderr)
+    import aggregate
+    from async_unifi_os_controller import AsyncUniFiOSController, default_session_cache_path
+    from pagination import decode_cursor, encode_cursor, page_order, sort_key
+    from records import Client, Device
+    from report_cache import REPORT_INTERVALS, REPORT_TYPES, ReportCache, default_report_cache_path
+    from rf_analytics import CHANNEL_COLUMNS, RADIO_COLUMNS, RadioTable, channel_rows, radio_table
+    from search_index import ClientSearchIndex
+    from snapshot_cache import Snapshot, normalize_mac
+    from snapshot_store import SnapshotStore, default_snapshot_dir
+except ImportError as e:
+    # Names the module that actually failed (often a missing dependency such as httpx)
+    print(f"Error: {e}", file=sys.stderr)
+    sys.exit(1)
+
+try:
+    from change_feed import ChangeFeed
+    from event_stream import WEBSOCKETS_AVAILABLE, EventStream
+    from history_store import HistoryRecorder, HistoryStore
+    from stats_poller import StatsPoller
+except ImportError as e:
+    print(f"Error: {e}", file=sys.stderr)
     sys.exit(1)
 
 
+async def _warm_start(ctrl: AsyncUniFiOSController):
+    """Log in in the background so the first tool call doesn't pay for it"""
+    try:
+        await ctrl.warm_up()
+    except Exception as e:
+        print(f"UniFi warm start failed (will retry on first tool call): {e}", file=sys.stderr)
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Start the controller logins as soon as the server runs; close the pools on exit"""
+    global _poller, _event_stream, _history
+
+    warm_tasks = []
+    if os.getenv("UNIFI_WARM_START", "1").lower() not in ("0", "false", "no"):
+        try:
+            warm_tasks = [asyncio.create_task(_warm_start(ctrl)) for ctrl in get_controllers().values()]
+        except ValueError as e:
+            print(f"UniFi warm start skipped: {e}", file=sys.stderr)
+
+    poll_interval = float(os.getenv("UNIFI_POLL_INTERVAL", "0"))
+    if poll_interval > 0:
+        try:
+            _poller = StatsPoller(
+                get_controller(),
+                interval=poll_interval,
+                capacity=int(os.getenv("UNIFI_POLL_SAMPLES", "60"))
+            )
+            _poller.start()
+        except ValueError as e:
+            print(f"UniFi stats poller disabled: {e}", file=sys.stderr)
+
+    if os.getenv("UNIFI_EVENTS", "0").lower() in ("1", "true", "yes"):
+        if not WEBSOCKETS_AVAILABLE:
+            print("UniFi event stream disabled: websockets not installed. Run: pip install websockets",
+                  file=sys.stderr)
+        else:
+            try:
+                _event_stream = EventStream(get_controller(), url=os.getenv("UNIFI_EVENTS_URL") or None)
+                _event_stream.start()
+            except ValueError as e:
+                print(f"UniFi event stream disabled: {e}", file=sys.stderr)
+
+    history_db = os.getenv("UNIFI_HISTORY_DB")
+    if history_db:
+        try:
+            _history = HistoryRecorder(
+                get_controller(),
+                HistoryStore(history_db, retention_days=float(os.getenv("UNIFI_HISTORY_RETENTION_DAYS", "30"))),
+                interval=float(os.getenv("UNIFI_HISTORY_INTERVAL", "300"))
+            )
+            _history.start()
+        except (ValueError, OSError, sqlite3.Error) as e:
+            print(f"UniFi history store disabled: {e}", file=sys.stderr)
+
+    try:
+        yield
+    finally:
+        for task in warm_tasks:
+            task.cancel()
+        if _poller is not None:
+            await _poller.stop()
+        if _event_stream is not None:
+            await _event_stream.stop()
+        if _history is not None:
+            await _history.stop()
+        for ctrl in (_controllers or {}).values():
+            await ctrl.aclose()
+            if ctrl.report_cache is not None:
+                ctrl.report_cache.close()
+
+
 # Initialize FastMCP server
-mcp = FastMCP("unifi")
+mcp = FastMCP("unifi", lifespan=lifespan)
+
+# Global controller instances by name (initialized on first use); the first is the primary
+_controllers: Optional[dict[str, AsyncUniFiOSController]] = None
+
+# Per-controller deadline (seconds) for fan-out queries, by controller name
+_controller_timeouts: dict[str, float] = {}
+
+# Background counter sampler for the primary controller (UNIFI_POLL_INTERVAL > 0)
+_poller: Optional[StatsPoller] = None
+
+# Pushed device/client updates for the primary controller (UNIFI_EVENTS=1)
+_event_stream: Optional[EventStream] = None
+
+# Observation recorder for the primary controller (UNIFI_HISTORY_DB set)
+_history: Optional[HistoryRecorder] = None
+
+# Composite health summaries by (host, port, site): (computed at, source snapshots, summary)
+_health_summaries: dict[tuple[str, int, str], tuple[float, Any, dict[str, Any]]] = {}
+
+# Default freshness window (seconds) for reusing a health summary outright
+HEALTH_CACHE_SECONDS = float(os.getenv("UNIFI_HEALTH_CACHE", "0"))
 
-# Global controller instance (initialized on first use)
-_controller: Optional[UniFiOSController] = None
+# Change feeds by (controller name, "clients" | "devices")
+_change_feeds: dict[tuple[str, str], ChangeFeed] = {}
 
+# Client search indexes by controller name, each with the lock that serializes its updates and searches
+_search_indexes: dict[str, tuple[ClientSearchIndex, asyncio.Lock]] = {}
 
-def get_controller() -> UniFiOSController:
-    """Get or create the Unifi controller connection."""
-    global _controller
+# Fields whose change makes a client or device count as "changed"
+CLIENT_CHANGE_FIELDS = ("name", "hostname", "ip", "is_wired", "ap_mac", "essid", "channel", "vlan")
+# Uplink is a nested object whose byte counters move constantly; only its topology fields count
+DEVICE_CHANGE_FIELDS = (
+    "name", "ip", "state", "adopted", "version",
+    "uplink.type", "uplink.uplink_mac", "uplink.uplink_remote_port", "uplink.speed",
+)
 
-    if _controller is not None:
-        return _controller
 
-    # Get credentials from environment
-    host = os.getenv("UNIFI_HOST")
+def _load_controller_configs() -> list[dict[str, Any]]:
+    """
+    Controller definitions from UNIFI_CONTROLLERS, or the single UNIFI_HOST setup.
+
+    UNIFI_CONTROLLERS is a JSON list (inline or a path to a JSON file) of objects
+    with name, host and optionally username, password, port, site, timeout,
+    session_cache, report_cache and snapshot_dir. Missing credentials fall back to UNIFI_USERNAME/UNIFI_PASSWORD.
+    """
     username = os.getenv("UNIFI_USERNAME")
     password = os.getenv("UNIFI_PASSWORD")
     port = int(os.getenv("UNIFI_PORT", "443"))
     site = os.getenv("UNIFI_SITE", "default")
 
-    if not all([host, username, password]):
+    raw = os.getenv("UNIFI_CONTROLLERS")
+    if not raw:
+        host = os.getenv("UNIFI_HOST")
+        return [{
+            "name": host,
+            "host": host,
+            "username": username,
+            "password": password,
+            "port": port,
+            "site": site,
+            "session_cache": os.getenv("UNIFI_SESSION_CACHE"),
+            "report_cache": os.getenv("UNIFI_REPORT_CACHE"),
+            "snapshot_dir": os.getenv("UNIFI_SNAPSHOT_DIR"),
+        }]
+
+    if not raw.lstrip().startswith(("[", "{")):
+        try:
+            raw = Path(raw).expanduser().read_text()
+        except OSError as e:
+            raise ValueError(f"UNIFI_CONTROLLERS file {raw} can't be read: {e.strerror or e}")
+    try:
+        entries = json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"UNIFI_CONTROLLERS is not valid JSON: {e}")
+    if not isinstance(entries, list):
+        raise ValueError("UNIFI_CONTROLLERS must be a JSON list of controller objects")
+
+    configs = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("host"):
+            raise ValueError(f"UNIFI_CONTROLLERS entry {i} must be an object with a host")
+        try:
+            entry_port = int(entry.get("port", port))
+        except (TypeError, ValueError):
+            raise ValueError(f"UNIFI_CONTROLLERS entry {i} has an invalid port: {entry.get('port')!r}")
+        name = entry.get("name") or entry.get("host")
+        if any(config["name"] == name for config in configs):
+            raise ValueError(f"UNIFI_CONTROLLERS entry {i} reuses the name {name!r}; give each controller its own name")
+        configs.append({
+            "name": name,
+            "host": entry.get("host"),
+            "username": entry.get("username", username),
+            "password": entry.get("password", password),
+            "port": entry_port,
+            "site": entry.get("site", site),
+            "timeout": entry.get("timeout"),
+            "session_cache": entry.get("session_cache"),
+            "report_cache": entry.get("report_cache", os.getenv("UNIFI_REPORT_CACHE")),
+            "snapshot_dir": entry.get("snapshot_dir", os.getenv("UNIFI_SNAPSHOT_DIR")),
+        })
+    return configs
+
+
+def get_controllers() -> dict[str, AsyncUniFiOSController]:
+    """Get or create connections to every configured Unifi controller."""
+    global _controllers
+
+    if _controllers is not None:
+        return _controllers
+
+    configs = _load_controller_configs()
+    site_concurrency = int(os.getenv("UNIFI_SITE_CONCURRENCY", "8"))
+    bulk_concurrency = int(os.getenv("UNIFI_BULK_CONCURRENCY", "8"))
+    http2 = os.getenv("UNIFI_HTTP2", "").lower() in ("1", "true", "yes")
+    default_timeout = float(os.getenv("UNIFI_CONTROLLER_TIMEOUT", "20"))
+    stale_max_age = float(os.getenv("UNIFI_STALE_MAX_AGE", "86400"))
+
+    if not configs or not all(c["host"] and c["username"] and c["password"] for c in configs):
         raise ValueError(
-            "Missing required environment variables: UNIFI_HOST, UNIFI_USERNAME, UNIFI_PASSWORD"
+            "Missing required environment variables: UNIFI_HOST, UNIFI_USERNAME, UNIFI_PASSWORD "
+            "(or UNIFI_CONTROLLERS entries with host and credentials)"
         )
 
-    _controller = UniFiOSController(
-        host=host,
-        username=username,
-        password=password,
-        port=port,
-        site_id=site,
-        ssl_verify=False  # Most self-hosted controllers use self-signed certs
-    )
+    controllers = {}
+    for config in configs:
+        host, port = config["host"], config["port"]
+        session_cache = config["session_cache"]
+        report_cache = None
+        if str(config.get("report_cache")).lower() not in ("0", "off", "false", "no"):
+            try:
+                report_cache = ReportCache(config.get("report_cache") or default_report_cache_path(host, port))
+            except (OSError, sqlite3.Error) as e:
+                print(f"UniFi report cache disabled for {host}: {e}", file=sys.stderr)
+        snapshot_dir = config.get("snapshot_dir")
+        snapshot_store = None
+        if str(snapshot_dir).lower() not in ("0", "off", "false", "no"):
+            snapshot_store = SnapshotStore(Path(snapshot_dir) if snapshot_dir else default_snapshot_dir(host, port))
+        # One pooled session per controller
+        controllers[config["name"]] = AsyncUniFiOSController(
+            host=host,
+            username=config["username"],
+            password=config["password"],
+            port=port,
+            site_id=config["site"],
+            ssl_verify=False,  # Most self-hosted controllers use self-signed certs
+            http2=http2,
+            session_cache=Path(session_cache) if session_cache else default_session_cache_path(host, port),
+            site_concurrency=site_concurrency,
+            bulk_concurrency=bulk_concurrency,
+            record_types={"/stat/device": Device, "/stat/sta": Client},
+            report_cache=report_cache,
+            snapshot_store=snapshot_store,
+            stale_max_age=stale_max_age
+        )
+        _controller_timeouts[config["name"]] = float(config.get("timeout") or default_timeout)
 
-    return _controller
+    _controllers = controllers
+    return _controllers
 
 
-@mcp.tool()
-def list_devices(device_type: Optional[str] = None) -> dict[str, Any]:
+def get_controller(name: Optional[str] = None) -> AsyncUniFiOSController:
+    """Get the named Unifi controller connection (the primary one if no name is given)."""
+    controllers = get_controllers()
+
+    if name is None:
+        return next(iter(controllers.values()))
+    if name not in controllers:
+        raise ValueError(f"Unknown controller '{name}'. Configured: {', '.join(controllers)}")
+    return controllers[name]
+
+
+def _format_device(device: Device) -> dict[str, Any]:
+    """Summary fields of a device for list responses"""
+    uptime = device.uptime or 0
+    return {
+        "name": device.name if device.name is not None else "Unnamed",
+        "mac": device.mac,
+        "model": device.model,
+        "type": device.type,
+        "ip": device.ip,
+        "state": device.state,
+        "adopted": device.adopted,
+        "uptime": uptime,
+        "uptime_days": round(uptime / 86400, 1),
+        "version": device.version,
+    }
+
+
+def _format_client(client: Client) -> dict[str, Any]:
+    """Summary fields of a client for list responses"""
+    uptime = client.uptime or 0
+    return {
+        "name": client.name or client.hostname or "Unknown",
+        "mac": client.mac,
+        "ip": client.ip,
+        "is_wired": client.is_wired,
+        "ap_mac": client.ap_mac,
+        "essid": client.essid,
+        "channel": client.channel,
+        "signal": client.signal,
+        "uptime": uptime,
+        "uptime_hours": round(uptime / 3600, 1),
+        "tx_bytes": client.tx_bytes or 0,
+        "rx_bytes": client.rx_bytes or 0,
+    }
+
+
+def _format_alarm(alarm: dict[str, Any]) -> dict[str, Any]:
+    """Summary fields of an alarm for list responses"""
+    return {
+        "datetime": datetime.fromtimestamp(alarm.get("datetime", 0) / 1000).isoformat(),
+        "key": alarm.get("key"),
+        "message": alarm.get("msg"),
+        "subsystem": alarm.get("subsystem"),
+        "site_id": alarm.get("site_id"),
+        "archived": alarm.get("archived", False),
+    }
+
+
+# Output fields of list_devices and list_clients entries
+DEVICE_LIST_FIELDS = (
+    "name", "mac", "model", "type", "ip", "state", "adopted", "uptime", "uptime_days", "version",
+)
+CLIENT_LIST_FIELDS = (
+    "name", "mac", "ip", "is_wired", "ap_mac", "essid", "channel", "signal",
+    "uptime", "uptime_hours", "tx_bytes", "rx_bytes",
+)
+
+# Columns whose few distinct values repeat across many rows
+DICTIONARY_COLUMNS = {"ap_mac", "essid", "model", "type", "version"}
+
+
+def _shape_listing(records: list[dict[str, Any]], available: tuple[str, ...],
+                   fields: Optional[list[str]], columnar: bool) -> Any:
     """
-    List all network devices (access points, switches, gateways).
+    Project formatted records onto the requested fields, optionally as columns.
 
-    Args:
-        device_type: Filter by device type (uap=access points, usw=switches, ugw=gateways).
-                     Leave empty to show all devices.
+    Columnar output is {"columns": [...], "rows": [[...], ...], "dictionaries":
+    {column: [values]}} where dictionary-encoded columns hold indexes into
+    their value list.
+    """
+    columns = list(fields) if fields else list(available)
+    unknown = [name for name in columns if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}")
+
+    if not columnar:
+        if not fields:
+            return records
+        return [{name: record[name] for name in columns} for record in records]
+
+    rows = [[record[name] for name in columns] for record in records]
+    dictionaries = {}
+    for i, name in enumerate(columns):
+        if name not in DICTIONARY_COLUMNS:
+            continue
+        values: list[Any] = []
+        codes: dict[Any, int] = {}
+        for row in rows:
+            code = codes.get(row[i])
+            if code is None:
+                code = codes[row[i]] = len(values)
+                values.append(row[i])
+            row[i] = code
+        dictionaries[name] = values
+
+    return {"columns": columns, "rows": rows, "dictionaries": dictionaries}
+
+
+def _freshness(snapshot: Snapshot) -> dict[str, Any]:
+    """When a snapshot was fetched and how old it is (it may be served stale while refreshing)"""
+    return {
+        "as_of": datetime.fromtimestamp(snapshot.as_of).isoformat(timespec="seconds"),
+        "age_seconds": round(snapshot.age, 1),
+    }
 
-    Returns:
-        Dictionary containing list of devices with their details (name, model, IP, status, uptime).
+
+# Endpoint whose snapshots each paged listing is cut from
+LIST_ENDPOINTS = {"devices": "/stat/device", "clients": "/stat/sta"}
+
+# Formatted list fields computed from another record field, for sorting
+DERIVED_SORT_FIELDS = {"uptime_days": "uptime", "uptime_hours": "uptime"}
+
+
+async def _list_page(kind: str, ctrl: AsyncUniFiOSController, snapshot: Callable[[], Awaitable[Snapshot]],
+                     filter_records: Callable[[list[Any], Optional[str]], list[Any]], filter_value: Optional[str],
+                     format_record: Callable[[Any], dict[str, Any]], available: tuple[str, ...],
+                     fields: Optional[list[str]], columnar: bool, page_size: Optional[int],
+                     cursor: Optional[str], sort: Optional[str], descending: bool) -> dict[str, Any]:
     """
-    ctrl = get_controller()
-    devices = ctrl.get_aps()  # Despite the name, this returns all device types
+    One page of list_devices or list_clients, cut from a pinned snapshot.
+
+    The first call pins the current snapshot; its cursor carries the snapshot
+    id, filter and sort, so following pages slice the same ordered listing
+    without fetching again.
+    """
+    if cursor is not None:
+        try:
+            state = decode_cursor(cursor)
+        except ValueError as e:
+            return {"error": str(e)}
+        if state.get("k") != kind:
+            return {"error": f"Cursor is not from list_{kind}"}
+        pinned = ctrl.pinned_snapshot(state["s"])
+        if pinned is None or pinned.endpoint != LIST_ENDPOINTS[kind]:
+            return {"error": f"Snapshot {state['s']} of this cursor is no longer available; "
+                             "list again without a cursor to start over"}
+        offset, filter_value = state["o"], state.get("f")
+        sort, descending = state.get("by"), state.get("desc", False)
+        page_size = page_size or state.get("n")
+    else:
+        if sort is not None and sort not in available:
+            return {"error": f"Unknown sort field '{sort}'. Available: {', '.join(available)}"}
+        pinned = await snapshot()
+        offset = 0
+        if page_size is not None:
+            ctrl.pin_snapshot(pinned)
+    if page_size is not None and page_size < 1:
+        return {"error": "page_size must be at least 1"}
+
+    def select(records: list[Any]) -> list[Any]:
+        return filter_records(records, filter_value)
+
+    if sort is None:
+        ordered = pinned.memo(("page_order", filter_value), lambda: select(pinned.data))
+    else:
+        field = DERIVED_SORT_FIELDS.get(sort, sort)
+        if kind == "clients" and field == "name":
+            def value(client):
+                return client.get("name") or client.get("hostname")
+        else:
+            def value(record):
+                return record.get(field)
+        ordered = page_order(pinned, (filter_value, sort), select, sort_key(sort, value), descending)
+
+    end = len(ordered) if page_size is None else offset + page_size
+    # Only the records on this page are formatted
+    formatted = [format_record(record) for record in ordered[offset:end]]
+    try:
+        listing = _shape_listing(formatted, available, fields, columnar)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    if page_size is None:
+        return {"count": len(ordered), **_freshness(pinned), kind: listing}
+
+    next_cursor = None
+    if end < len(ordered):
+        next_cursor = encode_cursor(pinned.id, end, k=kind, f=filter_value, by=sort, desc=descending, n=page_size)
+    return {
+        "count": len(ordered),
+        "snapshot_id": pinned.id,
+        **_freshness(pinned),
+        "offset": offset,
+        "next_cursor": next_cursor,
+        kind: listing,
+    }
 
-    # Filter by type if specified
+
+def _filter_devices(devices: list[Device], device_type: Optional[str]) -> list[Device]:
+    """Keep devices of one type (uap, usw, ugw) or all of them"""
     if device_type:
-        devices = [d for d in devices if d.get("type") == device_type]
+        return [d for d in devices if d.type == device_type]
+    return devices
+
+
+def _filter_clients(clients: list[Client], connection_type: Optional[str]) -> list[Client]:
+    """Keep wireless or wired clients, or all of them"""
+    if connection_type == "wireless":
+        return [c for c in clients if c.is_wired is False]
+    if connection_type == "wired":
+        return [c for c in clients if c.is_wired is True]
+    return clients
+
 
-    # Format the response
-    formatted_devices = []
+def _summarize_health(devices: list[Device], clients: list[Client],
+                      health: list[dict[str, Any]]) -> dict[str, Any]:
+    """Device and client counters plus the controller's health subsystems"""
+    adopted_devices = connected_devices = 0
     for device in devices:
-        formatted_devices.append({
-            "name": device.get("name", "Unnamed"),
-            "mac": device.get("mac"),
-            "model": device.get("model"),
-            "type": device.get("type"),
-            "ip": device.get("ip"),
-            "state": device.get("state"),
-            "adopted": device.get("adopted"),
-            "uptime": device.get("uptime", 0),
-            "uptime_days": round(device.get("uptime", 0) / 86400, 1),
-            "version": device.get("version"),
-        })
+        if device.adopted:
+            adopted_devices += 1
+        if device.state == 1:
+            connected_devices += 1
+
+    wired_clients = 0
+    for client in clients:
+        if client.is_wired:
+            wired_clients += 1
 
     return {
-        "count": len(formatted_devices),
-        "devices": formatted_devices
+        "devices": {
+            "total": len(devices),
+            "adopted": adopted_devices,
+            "connected": connected_devices,
+            "disconnected": len(devices) - connected_devices
+        },
+        "clients": {
+            "total": len(clients),
+            "wireless": len(clients) - wired_clients,
+            "wired": wired_clients
+        },
+        "health_info": health
     }
 
 
+async def _network_health(ctrl: AsyncUniFiOSController, site: Optional[str] = None,
+                          max_age: Optional[float] = None,
+                          cached_within: Optional[float] = None) -> dict[str, Any]:
+    """
+    Health summary of one site, served from the composite health cache when possible.
+
+    A summary computed less than cached_within seconds ago is returned as is.
+    Otherwise the three lists are read concurrently (through their own caches)
+    and the summary is only recomputed if one of them actually changed.
+    """
+    key = (ctrl.host, ctrl.port, site or ctrl.site_id)
+    if cached_within is None:
+        cached_within = HEALTH_CACHE_SECONDS
+    cached = _health_summaries.get(key)
+    if cached is not None and max_age != 0 and time.monotonic() - cached[0] <= cached_within:
+        return cached[2]
+
+    snapshots = await asyncio.gather(
+        ctrl.get_devices_snapshot(max_age, site),
+        ctrl.get_clients_snapshot(max_age, site),
+        ctrl.get_health_snapshot(max_age, site),
+    )
+    if cached is not None and all(a is b for a, b in zip(cached[1], snapshots)):
+        summary = cached[2]
+    else:
+        devices, clients, health = (snapshot.data for snapshot in snapshots)
+        summary = _summarize_health(devices, clients, health)
+        summary["as_of"] = datetime.fromtimestamp(
+            time.time() - max(snapshot.age for snapshot in snapshots)
+        ).isoformat(timespec="seconds")
+
+    _health_summaries[key] = (time.monotonic(), snapshots, summary)
+    return summary
+
+
+def _bulk_response(action: str, outcomes: list[tuple[str, Optional[BaseException]]]) -> dict[str, Any]:
+    """Per-client results of a bulk command plus overall counts"""
+    results = []
+    for mac, error in outcomes:
+        if error is None:
+            results.append({"mac": mac, "status": "success"})
+        else:
+            results.append({"mac": mac, "status": "error", "error": str(error) or type(error).__name__})
+
+    failed = sum(1 for _, error in outcomes if error is not None)
+    succeeded = len(outcomes) - failed
+    if failed == 0:
+        status = "success"
+    elif succeeded == 0:
+        status = "failed"
+    else:
+        status = "partial"
+
+    return {
+        "status": status,
+        "message": f"{action} {succeeded} of {len(outcomes)} clients",
+        "succeeded": succeeded,
+        "failed": failed,
+        "results": results
+    }
+
+
+async def _across_sites(fetch, sites: Optional[list[str]] = None,
+                        controllers: Optional[list[str]] = None) -> tuple[dict[str, Any], dict[str, str]]:
+    """
+    Run fetch(ctrl, site) on every site of every selected controller in parallel.
+
+    Controllers are queried concurrently, each bounded by its own timeout so a
+    slow controller fails on its own instead of stalling the merged answer.
+    Results are keyed by (controller, site); errors by "controller/site", or by
+    controller name when the whole controller failed or timed out.
+    """
+    selected = get_controllers()
+    if controllers:
+        selected = {name: get_controller(name) for name in controllers}
+
+    async def run(name: str, ctrl: AsyncUniFiOSController) -> dict[str, Any]:
+        timeout = _controller_timeouts.get(name)
+        try:
+            return await asyncio.wait_for(
+                ctrl.for_each_site(lambda site: fetch(ctrl, site), sites), timeout
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"timed out after {timeout:g}s")
+
+    outcomes = await asyncio.gather(*(run(name, ctrl) for name, ctrl in selected.items()),
+                                    return_exceptions=True)
+
+    succeeded = {}
+    errors = {}
+    for name, outcome in zip(selected, outcomes):
+        if isinstance(outcome, BaseException):
+            errors[name] = str(outcome) or type(outcome).__name__
+            continue
+        for site, result in outcome.items():
+            if isinstance(result, BaseException):
+                errors[f"{name}/{site}"] = str(result) or type(result).__name__
+            else:
+                succeeded[(name, site)] = result
+    return succeeded, errors
+
+
+@mcp.tool()
+async def list_devices(device_type: Optional[str] = None, max_age: Optional[float] = None,
+                       controller: Optional[str] = None, fields: Optional[list[str]] = None,
+                       columnar: bool = False, page_size: Optional[int] = None,
+                       cursor: Optional[str] = None, sort: Optional[str] = None,
+                       descending: bool = False) -> dict[str, Any]:
+    """
+    List all network devices (access points, switches, gateways).
+
+    Args:
+        device_type: Filter by device type (uap=access points, usw=switches, ugw=gateways).
+                     Leave empty to show all devices.
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+                 Leave empty to use the default cache TTL.
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+        fields: Only include these fields in each entry (e.g. ["name", "mac", "ip"]).
+                Leave empty for all fields.
+        columnar: Return one list of column names plus row arrays instead of a list of
+                  dictionaries. Repeated values (essid, ap_mac, model, ...) are replaced by
+                  indexes into a per-column "dictionaries" list. Much smaller for large listings.
+        page_size: Return at most this many devices plus a next_cursor for the rest.
+                   Leave empty to return every device.
+        cursor: next_cursor of the previous page. Pages come from the same snapshot as the
+                first page; device_type, sort and descending are taken from the cursor.
+        sort: Order by one of the entry fields (e.g. "name", "uptime"). Leave empty for
+              controller order.
+        descending: Sort largest first (missing values stay last).
+
+    Returns:
+        Dictionary containing list of devices with their details (name, model, IP, status, uptime),
+        plus as_of/age_seconds of the data (older than the cache TTL while a refresh runs). Paged results also include the snapshot_id, the offset and the next_cursor (null on the last page).
+    """
+    ctrl = get_controller(controller)
+    return await _list_page(
+        "devices", ctrl, lambda: ctrl.get_devices_snapshot(max_age), _filter_devices, device_type,
+        _format_device, DEVICE_LIST_FIELDS, fields, columnar, page_size, cursor, sort, descending
+    )
+
+
 @mcp.tool()
-def list_clients(connection_type: Optional[str] = None) -> dict[str, Any]:
+async def list_clients(connection_type: Optional[str] = None, max_age: Optional[float] = None,
+                       controller: Optional[str] = None, fields: Optional[list[str]] = None,
+                       columnar: bool = False, page_size: Optional[int] = None,
+                       cursor: Optional[str] = None, sort: Optional[str] = None,
+                       descending: bool = False) -> dict[str, Any]:
     """
     List all connected clients on the network.
 
     Args:
         connection_type: Filter by connection type ('wireless' or 'wired').
                         Leave empty to show all clients.
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+                 Leave empty to use the default cache TTL.
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+        fields: Only include these fields in each entry (e.g. ["name", "mac", "ip"]).
+                Leave empty for all fields.
+        columnar: Return one list of column names plus row arrays instead of a list of
+                  dictionaries. Repeated values (essid, ap_mac, model, ...) are replaced by
+                  indexes into a per-column "dictionaries" list. Much smaller for large listings.
+        page_size: Return at most this many clients plus a next_cursor for the rest (recommended
+                   on large sites, e.g. 500). Leave empty to return every client.
+        cursor: next_cursor of the previous page. Pages come from the same snapshot as the
+                first page; connection_type, sort and descending are taken from the cursor.
+        sort: Order by one of the entry fields (e.g. "name", "ip", "signal", "tx_bytes").
+              Leave empty for controller order.
+        descending: Sort largest first (missing values stay last).
 
     Returns:
-        Dictionary containing list of clients with their connection details.
+        Dictionary containing list of clients with their connection details, plus as_of/age_seconds
+        of the data (older than the cache TTL while a refresh runs). Paged results also include the snapshot_id, the offset and the next_cursor (null on the last page).
     """
-    ctrl = get_controller()
-    clients = ctrl.get_clients()
+    ctrl = get_controller(controller)
+    return await _list_page(
+        "clients", ctrl, lambda: ctrl.get_clients_snapshot(max_age), _filter_clients, connection_type,
+        _format_client, CLIENT_LIST_FIELDS, fields, columnar, page_size, cursor, sort, descending
+    )
 
-    # Filter by connection type if specified
-    if connection_type == "wireless":
-        clients = [c for c in clients if c.get("is_wired") is False]
-    elif connection_type == "wired":
-        clients = [c for c in clients if c.get("is_wired") is True]
 
-    # Format the response
-    formatted_clients = []
-    for client in clients:
-        formatted_clients.append({
-            "name": client.get("name") or client.get("hostname", "Unknown"),
-            "mac": client.get("mac"),
-            "ip": client.get("ip"),
-            "is_wired": client.get("is_wired"),
-            "ap_mac": client.get("ap_mac"),
-            "essid": client.get("essid"),
-            "channel": client.get("channel"),
-            "signal": client.get("signal"),
-            "uptime": client.get("uptime", 0),
-            "uptime_hours": round(client.get("uptime", 0) / 3600, 1),
-            "tx_bytes": client.get("tx_bytes", 0),
-            "rx_bytes": client.get("rx_bytes", 0),
-        })
+@mcp.tool()
+async def find_client(query: str, limit: int = 10, fuzzy: bool = True, max_age: Optional[float] = None,
+                      controller: Optional[str] = None) -> dict[str, Any]:
+    """
+    Find clients by partial name, hostname, IP or MAC without listing every client.
+
+    Exact and prefix matches rank first, then substrings (e.g. a MAC fragment in any
+    notation), then similar spellings.
 
+    Args:
+        query: Text to look for (e.g. "johns-lap", "192.168.1.", "4c:2f")
+        limit: Maximum number of matches to return (default: 10)
+        fuzzy: Also return near-misses for misspelled names (default: true)
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+
+    Returns:
+        Dictionary with the best matching clients, each with its score and matched field.
+    """
+    ctrl = get_controller(controller)
+    name = controller or next(iter(get_controllers()))
+    snapshot = await ctrl.get_clients_snapshot(max_age)
+
+    if name not in _search_indexes:
+        _search_indexes[name] = (ClientSearchIndex(), asyncio.Lock())
+    index, lock = _search_indexes[name]
+    async with lock:
+        # The first build of a large site's index takes a moment; keep the event loop free.
+        # The lock keeps a concurrent call from searching (or updating) a half-updated index.
+        await asyncio.to_thread(index.update, snapshot)
+        matches = index.search(query, limit, fuzzy)
     return {
-        "count": len(formatted_clients),
-        "clients": formatted_clients
+        "query": query,
+        "count": len(matches),
+        **_freshness(snapshot),
+        "clients": [{**_format_client(client), "score": score, "matched": field}
+                    for score, field, client in matches]
     }
 
 
 @mcp.tool()
-def get_device_stats(device_mac: str) -> dict[str, Any]:
+async def get_device_stats(device_mac: str, max_age: Optional[float] = None,
+                           refresh: bool = False, controller: Optional[str] = None) -> dict[str, Any]:
     """
     Get detailed statistics for a specific network device.
 
     Args:
         device_mac: MAC address of the device (format: aa:bb:cc:dd:ee:ff)
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+                 Leave empty to use the default cache TTL.
+        refresh: Query this single device directly instead of the cached device list.
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
 
     Returns:
         Dictionary with detailed device statistics including performance metrics.
     """
-    ctrl = get_controller()
-    devices = ctrl.get_aps()
+    ctrl = get_controller(controller)
 
     # Find the specific device
-    device = next((d for d in devices if d.get("mac") == device_mac), None)
+    if refresh:
+        device = await ctrl.refresh_device(device_mac)
+        freshness = {"as_of": datetime.now().isoformat(timespec="seconds"), "age_seconds": 0.0}
+    else:
+        snapshot = await ctrl.get_devices_snapshot(max_age)
+        device = snapshot.lookup(device_mac)
+        freshness = _freshness(snapshot)
 
     if not device:
         return {"error": f"Device with MAC {device_mac} not found"}
 
     return {
-        "name": device.get("name"),
-        "mac": device.get("mac"),
-        "model": device.get("model"),
-        "ip": device.get("ip"),
-        "state": device.get("state"),
-        "uptime": device.get("uptime"),
-        "uptime_days": round(device.get("uptime", 0) / 86400, 1),
-        "version": device.get("version"),
-        "num_sta": device.get("num_sta", 0),  # Number of connected stations
-        "user-num_sta": device.get("user-num_sta", 0),
-        "guest-num_sta": device.get("guest-num_sta", 0),
-        "satisfaction": device.get("satisfaction"),
-        "bytes": device.get("bytes", 0),
-        "tx_bytes": device.get("tx_bytes", 0),
-        "rx_bytes": device.get("rx_bytes", 0),
-        "uplink": device.get("uplink"),
+        "name": device.name,
+        "mac": device.mac,
+        "model": device.model,
+        "ip": device.ip,
+        "state": device.state,
+        "uptime": device.uptime,
+        "uptime_days": round((device.uptime or 0) / 86400, 1),
+        "version": device.version,
+        "num_sta": device.num_sta or 0,  # Number of connected stations
+        "user-num_sta": device.user_num_sta or 0,
+        "guest-num_sta": device.guest_num_sta or 0,
+        "satisfaction": device.satisfaction,
+        "bytes": device.bytes or 0,
+        "tx_bytes": device.tx_bytes or 0,
+        "rx_bytes": device.rx_bytes or 0,
+        "uplink": device.uplink,
+        # Per radio: channel, width, utilization (%), clients and tx retries
+        "radios": [dict(zip(RADIO_COLUMNS[2:-1], row[2:-1])) for row in RadioTable([device]).rows],
+        **freshness,
     }
 
 
 @mcp.tool()
-def restart_device(device_mac: str) -> dict[str, Any]:
+async def restart_device(device_mac: str, max_age: Optional[float] = None,
+                         controller: Optional[str] = None) -> dict[str, Any]:
     """
     Restart a network device (access point, switch, or gateway).
 
     Args:
         device_mac: MAC address of the device to restart (format: aa:bb:cc:dd:ee:ff)
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+                 Leave empty to use the default cache TTL.
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
 
     Returns:
         Dictionary confirming the restart command was sent.
     """
-    ctrl = get_controller()
+    ctrl = get_controller(controller)
 
     # Verify device exists first
-    devices = ctrl.get_aps()
-    device = next((d for d in devices if d.get("mac") == device_mac), None)
+    snapshot = await ctrl.get_devices_snapshot(max_age)
+    device = snapshot.lookup(device_mac)
 
     if not device:
         return {"error": f"Device with MAC {device_mac} not found"}
 
     # Restart the device
-    ctrl.restart_ap(device_mac)
+    await ctrl.restart_ap(device_mac)
 
     return {
         "status": "success",
         "message": f"Restart command sent to {device.get('name', 'device')} ({device_mac})",
         "device_name": device.get("name"),
-        "device_mac": device_mac
+        "device_mac": device_mac,
+        **_freshness(snapshot),
     }
 
 
 @mcp.tool()
-def block_client(client_mac: str) -> dict[str, Any]:
+async def block_client(client_mac: str, controller: Optional[str] = None) -> dict[str, Any]:
     """
     Block a client from accessing the network.
 
     Args:
         client_mac: MAC address of the client to block (format: aa:bb:cc:dd:ee:ff)
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
 
     Returns:
         Dictionary confirming the client was blocked.
     """
-    ctrl = get_controller()
-    ctrl.block_client(client_mac)
+    ctrl = get_controller(controller)
+    await ctrl.block_client(client_mac)
 
     return {
         "status": "success",
@@ -250,18 +869,19 @@ def block_client(client_mac: str) -> dict[str, Any]:
 
 
 @mcp.tool()
-def unblock_client(client_mac: str) -> dict[str, Any]:
+async def unblock_client(client_mac: str, controller: Optional[str] = None) -> dict[str, Any]:
     """
     Unblock a previously blocked client.
 
     Args:
         client_mac: MAC address of the client to unblock (format: aa:bb:cc:dd:ee:ff)
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
 
     Returns:
         Dictionary confirming the client was unblocked.
     """
-    ctrl = get_controller()
-    ctrl.unblock_client(client_mac)
+    ctrl = get_controller(controller)
+    await ctrl.unblock_client(client_mac)
 
     return {
         "status": "success",
@@ -271,8 +891,8 @@ def unblock_client(client_mac: str) -> dict[str, Any]:
 
 
 @mcp.tool()
-def authorize_guest(guest_mac: str, minutes: int = 480, up_bandwidth_kbps: Optional[int] = None,
-                   down_bandwidth_kbps: Optional[int] = None) -> dict[str, Any]:
+async def authorize_guest(guest_mac: str, minutes: int = 480, up_bandwidth_kbps: Optional[int] = None,
+                         down_bandwidth_kbps: Optional[int] = None, controller: Optional[str] = None) -> dict[str, Any]:
     """
     Authorize a guest client with optional time and bandwidth limits.
 
@@ -281,13 +901,14 @@ def authorize_guest(guest_mac: str, minutes: int = 480, up_bandwidth_kbps: Optio
         minutes: Number of minutes to authorize (default: 480 = 8 hours)
         up_bandwidth_kbps: Upload bandwidth limit in Kbps (optional)
         down_bandwidth_kbps: Download bandwidth limit in Kbps (optional)
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
 
     Returns:
         Dictionary confirming the guest was authorized with the specified limits.
     """
-    ctrl = get_controller()
+    ctrl = get_controller(controller)
 
-    ctrl.authorize_guest(
+    await ctrl.authorize_guest(
         guest_mac,
         minutes=minutes,
         up_bandwidth=up_bandwidth_kbps,
@@ -306,32 +927,26 @@ def authorize_guest(guest_mac: str, minutes: int = 480, up_bandwidth_kbps: Optio
 
 
 @mcp.tool()
-def list_alerts(limit: int = 20) -> dict[str, Any]:
+async def list_alerts(limit: int = 20, include_archived: bool = False, within_hours: Optional[float] = None,
+                      controller: Optional[str] = None) -> dict[str, Any]:
     """
     List recent network alerts and events.
 
     Args:
         limit: Maximum number of alerts to return (default: 20)
+        include_archived: Also return alerts that were archived (default: false)
+        within_hours: Only alerts from the last this many hours (default: no bound)
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
 
     Returns:
         Dictionary containing recent alerts with timestamps and details.
     """
-    ctrl = get_controller()
-    alarms = ctrl.get_alarms()
-
-    # Limit and format
-    alarms = alarms[:limit] if len(alarms) > limit else alarms
+    ctrl = get_controller(controller)
+    alarms = await ctrl.get_alarms(
+        limit=limit, archived=None if include_archived else False, within_hours=within_hours
+    )
 
-    formatted_alarms = []
-    for alarm in alarms:
-        formatted_alarms.append({
-            "datetime": datetime.fromtimestamp(alarm.get("datetime", 0) / 1000).isoformat(),
-            "key": alarm.get("key"),
-            "message": alarm.get("msg"),
-            "subsystem": alarm.get("subsystem"),
-            "site_id": alarm.get("site_id"),
-            "archived": alarm.get("archived", False),
-        })
+    formatted_alarms = [_format_alarm(alarm) for alarm in alarms[:limit]]
 
     return {
         "count": len(formatted_alarms),
@@ -340,55 +955,93 @@ def list_alerts(limit: int = 20) -> dict[str, Any]:
 
 
 @mcp.tool()
-def get_network_health() -> dict[str, Any]:
+async def alerts_since(cursor: Optional[int] = None, limit: int = 100, include_archived: bool = False,
+                       controller: Optional[str] = None) -> dict[str, Any]:
     """
-    Get overall network health status and statistics.
+    List only the alerts raised since a cursor, instead of re-reading recent alerts.
+
+    Call once without a cursor to get the newest alerts and a cursor, then pass the
+    returned cursor on later calls. Alerts after a cursor come oldest first; when
+    "more" is true, call again with the new cursor to get the next page.
+
+    Args:
+        cursor: Cursor returned by the previous call. Leave empty to start.
+        limit: Maximum number of alerts to return (default: 100)
+        include_archived: Also return alerts that were archived (default: false)
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
 
     Returns:
-        Dictionary with network health metrics including device status, client counts, and system info.
+        Dictionary with the new cursor, whether more alerts are waiting, and the alerts.
     """
-    ctrl = get_controller()
+    ctrl = get_controller(controller)
+    archived = None if include_archived else False
+
+    if cursor is None:
+        # Start tracking from the newest alert
+        alarms = await ctrl.get_alarms(limit=limit, archived=archived)
+        return {
+            "cursor": max((alarm.get("datetime", 0) for alarm in alarms), default=0),
+            "count": len(alarms),
+            "more": False,
+            "alerts": [_format_alarm(alarm) for alarm in alarms]
+        }
+
+    # One extra alarm tells whether another page follows
+    alarms = await ctrl.get_alarms(limit=limit + 1, archived=archived, newer_than=cursor, oldest_first=True)
+    page, more = alarms[:limit], len(alarms) > limit
+    if more and page and alarms[limit].get("datetime", 0) == page[-1].get("datetime", 0):
+        # The cursor is a timestamp, so a page must not end inside a group of equal timestamps
+        last = page[-1].get("datetime", 0)
+        earlier = [alarm for alarm in page if alarm.get("datetime", 0) < last]
+        if earlier:
+            page = earlier
+        else:
+            same = await ctrl.get_alarms(archived=archived, newer_than=last - 1, oldest_first=True)
+            page = [alarm for alarm in same if alarm.get("datetime", 0) == last]
 
-    # Gather various stats
-    devices = ctrl.get_aps()
-    clients = ctrl.get_clients()
-    health = ctrl.get_healthinfo()
+    return {
+        # The last alarm returned, so the next call continues right after this page
+        "cursor": page[-1].get("datetime", 0) if page else cursor,
+        "count": len(page),
+        "more": more,
+        "alerts": [_format_alarm(alarm) for alarm in page]
+    }
 
-    # Calculate health metrics
-    total_devices = len(devices)
-    adopted_devices = len([d for d in devices if d.get("adopted")])
-    connected_devices = len([d for d in devices if d.get("state") == 1])
 
-    total_clients = len(clients)
-    wireless_clients = len([c for c in clients if not c.get("is_wired")])
-    wired_clients = len([c for c in clients if c.get("is_wired")])
+@mcp.tool()
+async def get_network_health(max_age: Optional[float] = None, cached_within: Optional[float] = None,
+                             controller: Optional[str] = None) -> dict[str, Any]:
+    """
+    Get overall network health status and statistics.
 
-    return {
-        "devices": {
-            "total": total_devices,
-            "adopted": adopted_devices,
-            "connected": connected_devices,
-            "disconnected": total_devices - connected_devices
-        },
-        "clients": {
-            "total": total_clients,
-            "wireless": wireless_clients,
-            "wired": wired_clients
-        },
-        "health_info": health
-    }
+    Args:
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+                 Leave empty to use the default cache TTL.
+        cached_within: Return the last computed health summary if it is at most this many
+                       seconds old, without reading the device, client and health lists.
+                       Leave empty to use UNIFI_HEALTH_CACHE (default 0, off).
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+
+    Returns:
+        Dictionary with network health metrics including device status, client counts, and system info.
+    """
+    ctrl = get_controller(controller)
+    return await _network_health(ctrl, max_age=max_age, cached_within=cached_within)
 
 
 @mcp.tool()
-def get_site_info() -> dict[str, Any]:
+async def get_site_info(controller: Optional[str] = None) -> dict[str, Any]:
     """
     Get information about the Unifi site/controller.
 
+    Args:
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+
     Returns:
         Dictionary with site configuration and version information.
     """
-    ctrl = get_controller()
-    sites = ctrl.get_sites()
+    ctrl = get_controller(controller)
+    sites = await ctrl.get_sites()
 
     return {
         "sites": sites,
@@ -396,5 +1049,759 @@ def get_site_info() -> dict[str, Any]:
     }
 
 
+@mcp.tool()
+async def get_event_stream_status() -> dict[str, Any]:
+    """
+    Get the state of the controller event-stream subscription.
+
+    While connected, device and client lists are kept current by pushed updates
+    and served without polling the controller. Enable with UNIFI_EVENTS=1.
+
+    Returns:
+        Dictionary with connection state, reconnect and message counts, and the last error.
+    """
+    if _event_stream is None:
+        return {"enabled": False, "connected": False}
+
+    return {"enabled": True, **_event_stream.status()}
+
+
+# Throughput Tools
+
+
+def _throughput_response(history, kind: str, mac: Optional[str], window_seconds: float,
+                         limit: int) -> dict[str, Any]:
+    """Per-MAC byte rates from the poller's history, busiest first"""
+    if mac:
+        rate = history.rate(mac, window_seconds)
+        if rate is None:
+            return {"error": f"Not enough samples for {kind} {mac} in the last {window_seconds:g}s"}
+        rates = {normalize_mac(mac): rate}
+    else:
+        rates = history.rates(window_seconds)
+
+    entries = []
+    for entry_mac, (tx_rate, rx_rate, samples) in rates.items():
+        entries.append({
+            "mac": entry_mac,
+            "name": history.labels.get(entry_mac),
+            "tx_bytes_per_sec": round(tx_rate, 1),
+            "rx_bytes_per_sec": round(rx_rate, 1),
+            "total_bytes_per_sec": round(tx_rate + rx_rate, 1),
+            "samples": samples,
+        })
+    entries.sort(key=lambda entry: entry["total_bytes_per_sec"], reverse=True)
+
+    return {
+        "window_seconds": window_seconds,
+        "poll_interval": _poller.interval,
+        "last_poll": datetime.fromtimestamp(_poller.last_poll).isoformat() if _poller.last_poll else None,
+        "last_error": _poller.last_error,
+        "count": len(entries),
+        kind + "s": entries[:limit]
+    }
+
+
+@mcp.tool()
+async def get_client_throughput(client_mac: Optional[str] = None, window_seconds: float = 300,
+                                limit: int = 20) -> dict[str, Any]:
+    """
+    Current client bandwidth from the background stats poller ("who is using bandwidth right now").
+
+    Requires the poller to be enabled with UNIFI_POLL_INTERVAL (seconds between samples).
+
+    Args:
+        client_mac: MAC address of one client. Leave empty to rank all clients.
+        window_seconds: Sliding window to average over (default: 300)
+        limit: Maximum number of clients to return when ranking (default: 20)
+
+    Returns:
+        Dictionary with tx/rx bytes per second per client, busiest first.
+    """
+    if _poller is None:
+        return {"error": "Stats poller is not running. Set UNIFI_POLL_INTERVAL (e.g. 30) to enable it."}
+
+    return _throughput_response(_poller.clients, "client", client_mac, window_seconds, limit)
+
+
+@mcp.tool()
+async def get_device_throughput(device_mac: Optional[str] = None, window_seconds: float = 300,
+                                limit: int = 20) -> dict[str, Any]:
+    """
+    Current device (AP, switch, gateway) throughput from the background stats poller.
+
+    Requires the poller to be enabled with UNIFI_POLL_INTERVAL (seconds between samples).
+
+    Args:
+        device_mac: MAC address of one device. Leave empty to rank all devices.
+        window_seconds: Sliding window to average over (default: 300)
+        limit: Maximum number of devices to return when ranking (default: 20)
+
+    Returns:
+        Dictionary with tx/rx bytes per second per device, busiest first.
+    """
+    if _poller is None:
+        return {"error": "Stats poller is not running. Set UNIFI_POLL_INTERVAL (e.g. 30) to enable it."}
+
+    return _throughput_response(_poller.devices, "device", device_mac, window_seconds, limit)
+
+
+@mcp.tool()
+async def top_clients(metric: str = "total", limit: int = 10, group_by: Optional[str] = None,
+                      lowest: bool = False, window_seconds: float = 300,
+                      max_age: Optional[float] = None, controller: Optional[str] = None) -> dict[str, Any]:
+    """
+    Rank clients by traffic or signal without listing every client (e.g. "the 10 heaviest users").
+
+    Args:
+        metric: What to rank by: 'tx', 'rx' or 'total' (bytes since connect), 'rate' (current
+                bytes/sec, needs the stats poller; primary controller only), or 'signal'.
+        limit: Number of clients to return (per group when grouping, default: 10)
+        group_by: Rank separately per 'ap', 'ssid' or 'vlan'. Leave empty for one overall ranking.
+        lowest: Return the lowest values instead (e.g. weakest signal).
+        window_seconds: Averaging window for the 'rate' metric (default: 300)
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+
+    Returns:
+        Dictionary with the top clients (each with its ranking "value"), overall or per group.
+    """
+    if metric == "rate":
+        if _poller is None:
+            return {"error": "Ranking by rate needs the stats poller. Set UNIFI_POLL_INTERVAL (e.g. 30)."}
+        if controller is not None and controller != next(iter(get_controllers())):
+            # The poller only samples the primary controller's clients
+            return {"error": "Ranking by rate is only available for the primary controller."}
+        rates = _poller.clients.rates(window_seconds)
+
+        def value(client: Client):
+            rate = rates.get(normalize_mac(client.mac))
+            return rate[0] + rate[1] if rate else None
+    elif metric == "tx":
+        def value(client: Client):
+            return client.tx_bytes or 0
+    elif metric == "rx":
+        def value(client: Client):
+            return client.rx_bytes or 0
+    elif metric == "total":
+        def value(client: Client):
+            return (client.tx_bytes or 0) + (client.rx_bytes or 0)
+    elif metric == "signal":
+        def value(client: Client):
+            return client.signal
+    else:
+        return {"error": f"Unknown metric '{metric}'. Use tx, rx, total, rate or signal."}
+
+    if group_by is not None and group_by not in ("ap", "ssid", "vlan"):
+        return {"error": f"Unknown group_by '{group_by}'. Use ap, ssid or vlan."}
+
+    ctrl = get_controller(controller)
+    snapshot = await ctrl.get_clients_snapshot(max_age)
+
+    select = heapq.nsmallest if lowest else heapq.nlargest
+
+    def rank(clients: list[Client]) -> list[dict[str, Any]]:
+        # Partial selection: O(n log limit), and only the winners are formatted
+        scored = ((v, i, c) for i, c in enumerate(clients) if (v := value(c)) is not None)
+        return [{**_format_client(client), "value": v}
+                for v, _, client in select(limit, scored, key=lambda item: item[0])]
+
+    if group_by is None:
+        return {
+            "metric": metric,
+            "count": len(snapshot.data),
+            **_freshness(snapshot),
+            "clients": rank(snapshot.data)
+        }
+
+    # The snapshot's own indexes: APs by normalized MAC, SSIDs by name
+    if group_by == "ap":
+        groups = snapshot.by_ap
+    elif group_by == "ssid":
+        groups = snapshot.by_essid
+    else:
+        groups = snapshot.group_by("vlan")
+    return {
+        "metric": metric,
+        "group_by": group_by,
+        **_freshness(snapshot),
+        "groups": {str(key): rank(clients) for key, clients in groups.items() if key is not None}
+    }
+
+
+@mcp.tool()
+async def client_breakdown(group_by: str = "ap", sort: str = "clients", limit: Optional[int] = None,
+                           max_age: Optional[float] = None, controller: Optional[str] = None) -> dict[str, Any]:
+    """
+    Summarize all clients per AP, SSID, channel or radio in one compact table (e.g. "which AP
+    has the most clients and the weakest signal").
+
+    Args:
+        group_by: Group clients by 'ap', 'ssid', 'channel' or 'radio' (default: ap)
+        sort: Column to order groups by, largest first: clients, wireless, tx_bytes, rx_bytes,
+              signal_min, signal_p10, signal_p50, signal_p90 or signal_mean (default: clients)
+        limit: Maximum number of groups to return. Leave empty for all.
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+
+    Returns:
+        Dictionary with the column names and one row per group: client counts, byte totals and
+        signal min/p10/p50/p90/mean in dBm (wireless clients only).
+    """
+    field = aggregate.GROUP_FIELDS.get(group_by)
+    if field is None:
+        return {"error": f"Unknown group_by '{group_by}'. Use ap, ssid, channel or radio."}
+    if sort == "group" or sort not in aggregate.AGGREGATE_COLUMNS:
+        return {"error": f"Unknown sort '{sort}'. Use one of {', '.join(aggregate.AGGREGATE_COLUMNS[1:])}."}
+
+    ctrl = get_controller(controller)
+    snapshot = await ctrl.get_clients_snapshot(max_age)
+    rows = aggregate.top_groups(aggregate.aggregate_clients(snapshot, field), sort, limit)
+    columns = list(aggregate.AGGREGATE_COLUMNS)
+
+    if group_by == "ap":
+        # Name each AP from the device list so rows don't need a second lookup
+        devices = await ctrl.get_devices_snapshot(max_age)
+        columns.insert(1, "ap_name")
+        rows = [[row[0], (devices.lookup(row[0]) or {}).get("name") if row[0] else None, *row[1:]]
+                for row in rows]
+
+    return {
+        "group_by": group_by,
+        "count": len(snapshot.data),
+        **_freshness(snapshot),
+        "groups": len(rows),
+        "columns": columns,
+        "rows": rows
+    }
+
+
+@mcp.tool()
+async def get_rf_analytics(band: Optional[str] = None, sort: str = "utilization", limit: Optional[int] = None,
+                           max_age: Optional[float] = None, controller: Optional[str] = None) -> dict[str, Any]:
+    """
+    Channel utilization, retry ratios and co-channel overlap of every AP radio in one call
+    (e.g. for planning channel changes).
+
+    Utilization is the percentage of airtime in use on the channel (self_tx and self_rx are
+    this radio's share, interference the rest). Retry ratios are tx retries per packet since
+    the radio came up. "overlapping" counts the other radios whose channel (including bonded
+    width) overlaps, across all APs of the site.
+
+    Args:
+        band: Only radios in '2g', '5g' or '6g'. Leave empty for all bands.
+        sort: Radio column to order by, largest first: utilization, interference, clients,
+              retry_ratio or overlapping (default: utilization)
+        limit: Maximum number of radios to return. Leave empty for all.
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+
+    Returns:
+        Dictionary with per-radio rows and per-channel rows, each with its column names.
+    """
+    if band is not None and band not in ("2g", "5g", "6g"):
+        return {"error": f"Unknown band '{band}'. Use 2g, 5g or 6g."}
+    if sort not in ("utilization", "interference", "clients", "retry_ratio", "overlapping"):
+        return {"error": f"Unknown sort '{sort}'. Use utilization, interference, clients, retry_ratio or overlapping."}
+
+    ctrl = get_controller(controller)
+    snapshot = await ctrl.get_devices_snapshot(max_age)
+    table = radio_table(snapshot)
+
+    i = RADIO_COLUMNS.index(sort)
+    radios = [row for row in table.rows if band is None or row[3] == band]
+    radios.sort(key=lambda row: (row[i] is not None, row[i] or 0), reverse=True)
+    channels = channel_rows(table, band)
+    return {
+        "radios": {"count": len(radios), "columns": list(RADIO_COLUMNS), "rows": radios[:limit] if limit else radios},
+        "channels": {"count": len(channels), "columns": list(CHANNEL_COLUMNS), "rows": channels},
+        **_freshness(snapshot),
+    }
+
+
+@mcp.tool()
+async def changes_since(cursor: Optional[int] = None, kind: str = "clients",
+                        max_age: Optional[float] = None,
+                        controller: Optional[str] = None) -> dict[str, Any]:
+    """
+    Report clients or devices that joined, left or changed since a cursor, instead of the full list.
+
+    Call once without a cursor to start tracking, then pass the returned cursor on later
+    calls. Changes are detected on name, IP, AP, SSID, channel and VLAN for clients and
+    on name, IP, state, adoption, firmware and uplink for devices.
+
+    Args:
+        cursor: Cursor returned by the previous call. Leave empty to start tracking.
+        kind: 'clients' or 'devices' (default: clients)
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+
+    Returns:
+        Dictionary with the new cursor plus added, changed and removed entries.
+    """
+    if kind not in ("clients", "devices"):
+        return {"error": f"Unknown kind '{kind}'. Use clients or devices."}
+
+    ctrl = get_controller(controller)
+    name = controller or next(iter(get_controllers()))
+
+    feed = _change_feeds.get((name, kind))
+    if feed is None:
+        fields = CLIENT_CHANGE_FIELDS if kind == "clients" else DEVICE_CHANGE_FIELDS
+        feed = _change_feeds[(name, kind)] = ChangeFeed(fields)
+
+    if kind == "clients":
+        snapshot = await ctrl.get_clients_snapshot(max_age)
+        format_record = _format_client
+    else:
+        snapshot = await ctrl.get_devices_snapshot(max_age)
+        format_record = _format_device
+
+    version = feed.observe(snapshot)
+
+    if cursor is None:
+        return {"cursor": version, "count": len(feed), **_freshness(snapshot),
+                "message": f"Tracking {len(feed)} {kind}"}
+
+    changes = feed.changes_since(cursor)
+    if changes is None:
+        return {
+            "cursor": version,
+            "count": len(feed),
+            **_freshness(snapshot),
+            "resync": True,
+            "message": f"Cursor {cursor} is too old or unknown; list {kind} again and continue from this cursor"
+        }
+
+    return {
+        "cursor": version,
+        "count": len(feed),
+        **_freshness(snapshot),
+        "added": [format_record(record) for record in changes["added"]],
+        "changed": [format_record(record) for record in changes["changed"]],
+        "removed": changes["removed"]
+    }
+
+
+# History Tools
+
+HISTORY_DISABLED = "History store is not enabled. Set UNIFI_HISTORY_DB (e.g. ~/.cache/unifi-mcp/history.db)."
+
+
+def _iso(ts: Optional[int]) -> Optional[str]:
+    """Epoch seconds from the history store as an ISO timestamp"""
+    return datetime.fromtimestamp(ts).isoformat() if ts is not None else None
+
+
+@mcp.tool()
+async def client_history(client_mac: str, since_hours: float = 24, limit: int = 50) -> dict[str, Any]:
+    """
+    When a client was first and last seen, and where it was connected over time.
+
+    Answered from the local history store, without querying the controller.
+
+    Args:
+        client_mac: MAC address of the client (any notation)
+        since_hours: How far back to list observations (default: 24)
+        limit: Maximum number of observations to return, newest first (default: 50)
+
+    Returns:
+        Dictionary with first_seen, last_seen and the client's recent observations.
+    """
+    if _history is None:
+        return {"error": HISTORY_DISABLED}
+
+    since = int(time.time() - since_hours * 3600)
+    result = await asyncio.to_thread(_history.store.client_history, client_mac, since, limit)
+    if not result["observations"]:
+        return {"error": f"No history for client {client_mac}"}
+
+    for row in result["rows"]:
+        row["time"] = _iso(row.pop("ts"))
+    return {
+        "mac": normalize_mac(client_mac),
+        "first_seen": _iso(result["first_seen"]),
+        "last_seen": _iso(result["last_seen"]),
+        "observations": result["observations"],
+        "history": result["rows"],
+    }
+
+
+@mcp.tool()
+async def ap_client_history(since_hours: float = 48, until_hours: float = 24,
+                            limit: int = 20) -> dict[str, Any]:
+    """
+    Clients per AP over a past time range, busiest first (e.g. "which AP had the most clients yesterday").
+
+    Args:
+        since_hours: Start of the range, in hours ago (default: 48)
+        until_hours: End of the range, in hours ago (default: 24)
+        limit: Maximum number of APs to return (default: 20)
+
+    Returns:
+        Dictionary with distinct and peak simultaneous client counts per AP.
+    """
+    if _history is None:
+        return {"error": HISTORY_DISABLED}
+    if until_hours >= since_hours:
+        return {"error": "since_hours must be further back than until_hours"}
+
+    now = time.time()
+    since, until = int(now - since_hours * 3600), int(now - until_hours * 3600)
+    aps = await asyncio.to_thread(_history.store.ap_client_counts, since, until, limit)
+
+    return {
+        "from": _iso(since),
+        "to": _iso(until),
+        "count": len(aps),
+        "aps": aps,
+    }
+
+
+@mcp.tool()
+async def alert_history(since_hours: float = 168, key: Optional[str] = None, limit: int = 100) -> dict[str, Any]:
+    """
+    Alerts kept in the local history store, newest first.
+
+    Args:
+        since_hours: How far back to look (default: 168, one week)
+        key: Only alerts of this type (e.g. "EVT_AP_Lost_Contact")
+        limit: Maximum number of alerts to return (default: 100)
+
+    Returns:
+        Dictionary containing stored alerts and the store's coverage.
+    """
+    if _history is None:
+        return {"error": HISTORY_DISABLED}
+
+    since = int(time.time() - since_hours * 3600)
+    alarms = await asyncio.to_thread(_history.store.alarms, since, key, limit)
+    for alarm in alarms:
+        alarm["datetime"] = _iso(alarm.pop("ts"))
+        alarm["archived"] = bool(alarm["archived"])
+
+    stats = await asyncio.to_thread(_history.store.stats)
+    return {
+        "count": len(alarms),
+        "alerts": alarms,
+        "recording_interval": _history.interval,
+        "last_record": _iso(int(_history.last_record)) if _history.last_record else None,
+        "last_error": _history.last_error,
+        "stored": {table: {"rows": row["n"], "oldest": _iso(row["oldest"]), "newest": _iso(row["newest"])}
+                   for table, row in stats.items()},
+    }
+
+
+# Report Tools
+
+
+@mcp.tool()
+async def get_report(report: str = "hourly.site", since_hours: float = 24, until_hours: float = 0,
+                     attrs: Optional[list[str]] = None, macs: Optional[list[str]] = None,
+                     controller: Optional[str] = None) -> dict[str, Any]:
+    """
+    Traffic and client-count trends from the controller's own rollups (e.g. "how did WAN
+    traffic change over the last week").
+
+    Finished hours and days are cached on disk, so repeated trend questions only fetch the
+    current bucket from the controller.
+
+    Args:
+        report: '<interval>.<type>' with interval 5minutes, hourly or daily and type site,
+                ap or user (default: hourly.site)
+        since_hours: Start of the range, in hours ago (default: 24)
+        until_hours: End of the range, in hours ago (default: 0, now)
+        attrs: Fields to return per bucket (e.g. ["bytes", "num_sta"]). Leave empty for the
+               type's defaults: site traffic and client counts, AP bytes and clients, or user tx/rx bytes.
+        macs: Only these APs or clients (ap and user reports)
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+
+    Returns:
+        Dictionary with the column names and one row per bucket (and AP or client), oldest first.
+    """
+    interval, _, report_type = report.partition(".")
+    if interval not in REPORT_INTERVALS or report_type not in REPORT_TYPES:
+        return {"error": f"Unknown report '{report}'. Use <{'|'.join(REPORT_INTERVALS)}>.<{'|'.join(REPORT_TYPES)}>, "
+                         "e.g. hourly.ap or daily.site."}
+    if until_hours >= since_hours:
+        return {"error": "since_hours must be further back than until_hours"}
+
+    ctrl = get_controller(controller)
+    now = time.time()
+    start, end = int((now - since_hours * 3600) * 1000), int((now - until_hours * 3600) * 1000)
+    rows = await ctrl.get_report(interval, report_type, start, end, attrs, macs)
+
+    object_field = REPORT_TYPES[report_type]
+    fields = [name for name in dict.fromkeys(attrs or (k for row in rows for k in row))
+              if name not in ("time", "oid", "o", "site", object_field)]
+    columns = ["time", *([object_field] if object_field else []), *fields]
+    return {
+        "report": report,
+        "from": _iso(start // 1000),
+        "to": _iso(end // 1000),
+        "count": len(rows),
+        "columns": columns,
+        "rows": [[_iso(row["time"] // 1000), *(row.get(name) for name in columns[1:])] for row in rows],
+    }
+
+
+# Bulk Client Tools
+
+
+@mcp.tool()
+async def block_clients(client_macs: list[str], controller: Optional[str] = None) -> dict[str, Any]:
+    """
+    Block many clients from accessing the network in one call.
+
+    Args:
+        client_macs: MAC addresses of the clients to block (format: aa:bb:cc:dd:ee:ff)
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+
+    Returns:
+        Dictionary with overall status and a success or error entry per client.
+    """
+    ctrl = get_controller(controller)
+    outcomes = await ctrl.bulk_client_command("block-sta", client_macs)
+
+    return _bulk_response("Blocked", outcomes)
+
+
+@mcp.tool()
+async def unblock_clients(client_macs: list[str], controller: Optional[str] = None) -> dict[str, Any]:
+    """
+    Unblock many previously blocked clients in one call.
+
+    Args:
+        client_macs: MAC addresses of the clients to unblock (format: aa:bb:cc:dd:ee:ff)
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+
+    Returns:
+        Dictionary with overall status and a success or error entry per client.
+    """
+    ctrl = get_controller(controller)
+    outcomes = await ctrl.bulk_client_command("unblock-sta", client_macs)
+
+    return _bulk_response("Unblocked", outcomes)
+
+
+@mcp.tool()
+async def authorize_guests(guest_macs: list[str], minutes: int = 480, up_bandwidth_kbps: Optional[int] = None,
+                           down_bandwidth_kbps: Optional[int] = None,
+                           controller: Optional[str] = None) -> dict[str, Any]:
+    """
+    Authorize many guest clients with the same time and bandwidth limits in one call.
+
+    Args:
+        guest_macs: MAC addresses of the guest clients (format: aa:bb:cc:dd:ee:ff)
+        minutes: Number of minutes to authorize (default: 480 = 8 hours)
+        up_bandwidth_kbps: Upload bandwidth limit in Kbps (optional)
+        down_bandwidth_kbps: Download bandwidth limit in Kbps (optional)
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+
+    Returns:
+        Dictionary with overall status and a success or error entry per guest.
+    """
+    ctrl = get_controller(controller)
+
+    params: dict[str, Any] = {"minutes": minutes}
+    if up_bandwidth_kbps:
+        params["up"] = up_bandwidth_kbps
+    if down_bandwidth_kbps:
+        params["down"] = down_bandwidth_kbps
+
+    outcomes = await ctrl.bulk_client_command("authorize-guest", guest_macs, **params)
+
+    response = _bulk_response("Authorized", outcomes)
+    response["minutes"] = minutes
+    response["expires_at"] = datetime.now().timestamp() + (minutes * 60)
+    return response
+
+
+@mcp.tool()
+async def disconnect_clients(client_macs: list[str], controller: Optional[str] = None) -> dict[str, Any]:
+    """
+    Disconnect many clients (forcing them to reassociate) in one call.
+
+    Args:
+        client_macs: MAC addresses of the clients to disconnect (format: aa:bb:cc:dd:ee:ff)
+        controller: Name of the controller to use (multi-controller setups). Leave empty for the primary.
+
+    Returns:
+        Dictionary with overall status and a success or error entry per client.
+    """
+    ctrl = get_controller(controller)
+    outcomes = await ctrl.bulk_client_command("kick-sta", client_macs)
+
+    return _bulk_response("Disconnected", outcomes)
+
+
+# Multi-site Tools
+
+
+@mcp.tool()
+async def list_devices_all_sites(sites: Optional[list[str]] = None, device_type: Optional[str] = None,
+                                 max_age: Optional[float] = None,
+                                 controllers: Optional[list[str]] = None) -> dict[str, Any]:
+    """
+    List network devices across every site and controller, queried in parallel.
+
+    Args:
+        sites: Site names (as in get_site_info) to query. Leave empty for all sites.
+        device_type: Filter by device type (uap=access points, usw=switches, ugw=gateways).
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+        controllers: Controller names to query (multi-controller setups). Leave empty for all.
+
+    Returns:
+        Dictionary with devices from all sites (each tagged with controller and site) and per-site errors.
+    """
+    results, errors = await _across_sites(
+        lambda ctrl, site: ctrl.get_aps(max_age, site), sites, controllers
+    )
+
+    formatted_devices = [
+        {**_format_device(device), "controller": controller, "site": site}
+        for (controller, site), devices in results.items()
+        for device in _filter_devices(devices, device_type)
+    ]
+
+    return {
+        "count": len(formatted_devices),
+        "sites_queried": len(results) + len(errors),
+        "devices": formatted_devices,
+        "errors": errors
+    }
+
+
+@mcp.tool()
+async def list_clients_all_sites(sites: Optional[list[str]] = None, connection_type: Optional[str] = None,
+                                 max_age: Optional[float] = None,
+                                 controllers: Optional[list[str]] = None) -> dict[str, Any]:
+    """
+    List connected clients across every site and controller, queried in parallel.
+
+    Args:
+        sites: Site names (as in get_site_info) to query. Leave empty for all sites.
+        connection_type: Filter by connection type ('wireless' or 'wired').
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+        controllers: Controller names to query (multi-controller setups). Leave empty for all.
+
+    Returns:
+        Dictionary with clients from all sites (each tagged with controller and site) and per-site errors.
+    """
+    results, errors = await _across_sites(
+        lambda ctrl, site: ctrl.get_clients(max_age, site), sites, controllers
+    )
+
+    formatted_clients = [
+        {**_format_client(client), "controller": controller, "site": site}
+        for (controller, site), clients in results.items()
+        for client in _filter_clients(clients, connection_type)
+    ]
+
+    return {
+        "count": len(formatted_clients),
+        "sites_queried": len(results) + len(errors),
+        "clients": formatted_clients,
+        "errors": errors
+    }
+
+
+@mcp.tool()
+async def list_alerts_all_sites(sites: Optional[list[str]] = None, limit: int = 20,
+                                include_archived: bool = False,
+                                controllers: Optional[list[str]] = None) -> dict[str, Any]:
+    """
+    List the most recent alerts across every site and controller, queried in parallel.
+
+    Args:
+        sites: Site names (as in get_site_info) to query. Leave empty for all sites.
+        limit: Maximum number of alerts to return in total (default: 20)
+        include_archived: Also return alerts that were archived (default: false)
+        controllers: Controller names to query (multi-controller setups). Leave empty for all.
+
+    Returns:
+        Dictionary with the newest alerts from all sites (each tagged with controller and site) and per-site errors.
+    """
+    results, errors = await _across_sites(
+        lambda ctrl, site: ctrl.get_alarms(site, limit=limit, archived=None if include_archived else False),
+        sites, controllers
+    )
+
+    alarms = [(key, alarm) for key, site_alarms in results.items() for alarm in site_alarms]
+    alarms.sort(key=lambda item: item[1].get("datetime", 0), reverse=True)
+
+    formatted_alarms = [
+        {**_format_alarm(alarm), "controller": controller, "site": site}
+        for (controller, site), alarm in alarms[:limit]
+    ]
+
+    return {
+        "count": len(formatted_alarms),
+        "sites_queried": len(results) + len(errors),
+        "alerts": formatted_alarms,
+        "errors": errors
+    }
+
+
+@mcp.tool()
+async def get_network_health_all_sites(sites: Optional[list[str]] = None,
+                                       max_age: Optional[float] = None,
+                                       controllers: Optional[list[str]] = None) -> dict[str, Any]:
+    """
+    Get network health for every site and controller, queried in parallel.
+
+    Args:
+        sites: Site names (as in get_site_info) to query. Leave empty for all sites.
+        max_age: Serve cached data up to this many seconds old (0 forces a fresh fetch).
+        controllers: Controller names to query (multi-controller setups). Leave empty for all.
+
+    Returns:
+        Dictionary with per-site health (keyed "controller/site"), totals, and per-site errors.
+    """
+    results, errors = await _across_sites(
+        lambda ctrl, site: _network_health(ctrl, site, max_age), sites, controllers
+    )
+
+    totals = {
+        "devices": {"total": 0, "adopted": 0, "connected": 0, "disconnected": 0},
+        "clients": {"total": 0, "wireless": 0, "wired": 0},
+    }
+    for summary in results.values():
+        for group, counters in totals.items():
+            for key in counters:
+                counters[key] += summary[group][key]
+
+    return {
+        "totals": totals,
+        "sites": {f"{controller}/{site}": summary for (controller, site), summary in results.items()},
+        "errors": errors
+    }
+
+
+@mcp.tool()
+async def list_controllers() -> dict[str, Any]:
+    """
+    List the Unifi controllers this server is configured to manage.
+
+    Returns:
+        Dictionary with each controller's name, host and default site (the first is the primary).
+    """
+    controllers = get_controllers()
+
+    return {
+        "count": len(controllers),
+        "controllers": [
+            {
+                "name": name,
+                "host": ctrl.host,
+                "port": ctrl.port,
+                "site": ctrl.site_id,
+                "timeout": _controller_timeouts.get(name),
+            }
+            for name, ctrl in controllers.items()
+        ]
+    }
+
+
 if __name__ == "__main__":
     mcp.run()
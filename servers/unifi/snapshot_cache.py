@@ -0,0 +1,259 @@
+"""
+Snapshot cache for UniFi controller list endpoints.
+
+Keeps the last decoded response for each endpoint together with the time it was
+fetched, so repeated tool calls within one agent turn reuse the same data
+instead of pulling /stat/device and /stat/sta again.
+"""
+
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+
+# Default freshness window (seconds) per endpoint
+DEFAULT_TTLS: dict[str, float] = {
+    "/stat/device": 30.0,
+    "/stat/sta": 15.0,
+    "/stat/health": 15.0,
+}
+
+
+_MAC_SEPARATORS = re.compile(r"[^0-9a-f]")
+
+# Process-wide snapshot ids, so a pinned snapshot can be named in a cursor
+_snapshot_ids = itertools.count(1)
+
+
+def normalize_mac(mac: Optional[str]) -> str:
+    """Normalize a MAC address to aa:bb:cc:dd:ee:ff regardless of case or separators"""
+    if not mac:
+        return ""
+    digits = _MAC_SEPARATORS.sub("", mac.lower())
+    if len(digits) != 12:
+        return mac.lower()
+    return ":".join(digits[i:i + 2] for i in range(0, 12, 2))
+
+
+@dataclass
+class Snapshot:
+    """
+    Decoded response of one endpoint at a point in time.
+
+    Lookup indexes are built on first use and live as long as the snapshot, so
+    they are always consistent with the data they were built from.
+    """
+    endpoint: str
+    data: list[dict[str, Any]]
+    fetched_at: float = field(default_factory=time.monotonic)
+    site: Optional[str] = None
+    id: int = field(default_factory=lambda: next(_snapshot_ids))
+
+    @property
+    def age(self) -> float:
+        """Seconds since this snapshot was fetched"""
+        return time.monotonic() - self.fetched_at
+
+    @property
+    def as_of(self) -> float:
+        """Epoch time this snapshot was fetched"""
+        return time.time() - self.age
+
+    @cached_property
+    def by_mac(self) -> dict[str, dict[str, Any]]:
+        """Records keyed by normalized MAC"""
+        return {normalize_mac(r.get("mac")): r for r in self.data if r.get("mac")}
+
+    @cached_property
+    def by_ap(self) -> dict[str, list[dict[str, Any]]]:
+        """Records grouped by normalized ap_mac (clients only)"""
+        index: dict[str, list[dict[str, Any]]] = {}
+        for record in self.data:
+            ap_mac = record.get("ap_mac")
+            if ap_mac:
+                index.setdefault(normalize_mac(ap_mac), []).append(record)
+        return index
+
+    @cached_property
+    def by_essid(self) -> dict[str, list[dict[str, Any]]]:
+        """Records grouped by SSID (clients only)"""
+        index: dict[str, list[dict[str, Any]]] = {}
+        for record in self.data:
+            essid = record.get("essid")
+            if essid:
+                index.setdefault(essid, []).append(record)
+        return index
+
+    def group_by(self, name: str) -> dict[Any, list[dict[str, Any]]]:
+        """Records grouped by the value of any field (built once per field)"""
+        groups = self.__dict__.setdefault("_groups", {})
+        index = groups.get(name)
+        if index is None:
+            index = {}
+            for record in self.data:
+                index.setdefault(record.get(name), []).append(record)
+            groups[name] = index
+        return index
+
+    def memo(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Any other value derived from this snapshot, built once on first use"""
+        derived = self.__dict__.setdefault("_derived", {})
+        if key not in derived:
+            derived[key] = build()
+        return derived[key]
+
+    def lookup(self, mac: str) -> Optional[dict[str, Any]]:
+        """Find a record by MAC in any notation"""
+        return self.by_mac.get(normalize_mac(mac))
+
+
+class SnapshotCache:
+    """
+    Per-endpoint, per-site TTL cache of controller responses.
+
+    Endpoints without a configured TTL are never served from cache unless the
+    caller passes an explicit max_age. Snapshots marked live (kept current by
+    an event stream) are served regardless of their TTL. The last max_pinned
+    snapshots of each endpoint handed out for paging stay retrievable by id
+    after they are replaced.
+    """
+
+    def __init__(self, ttls: Optional[dict[str, float]] = None, max_pinned: int = 4):
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_pinned = max_pinned
+        self._snapshots: dict[tuple[Optional[str], str], Snapshot] = {}
+        self._live: set[tuple[Optional[str], str]] = set()
+        # Live snapshots missing a record the stream only sent part of; they expire by TTL again
+        self._incomplete: set[tuple[Optional[str], str]] = set()
+        self._pinned: OrderedDict[int, Snapshot] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str, max_age: Optional[float] = None,
+            site: Optional[str] = None) -> Optional[Snapshot]:
+        """Return the cached snapshot if it is younger than max_age (or the endpoint TTL)"""
+        with self._lock:
+            snapshot = self._snapshots.get((site, endpoint))
+            live = (site, endpoint) in self._live and (site, endpoint) not in self._incomplete
+        if snapshot is None:
+            return None
+        if max_age is None:
+            if live:
+                return snapshot
+            max_age = self.ttls.get(endpoint, 0.0)
+        if snapshot.age > max_age:
+            return None
+        return snapshot
+
+    def peek(self, endpoint: str, site: Optional[str] = None) -> Optional[Snapshot]:
+        """The cached snapshot however old it is (for serving stale data while refreshing)"""
+        with self._lock:
+            return self._snapshots.get((site, endpoint))
+
+    def set_live(self, endpoint: str, site: Optional[str], live: bool):
+        """Mark an endpoint as kept current by pushed updates (or back to TTL expiry)"""
+        with self._lock:
+            if live:
+                self._live.add((site, endpoint))
+            else:
+                self._live.discard((site, endpoint))
+
+    def upsert(self, endpoint: str, records: list[dict[str, Any]], site: Optional[str] = None,
+               fields: Optional[tuple[str, ...]] = None, record_type: Optional[type] = None,
+               removed: Iterable[str] = ()) -> Optional[Snapshot]:
+        """
+        Merge partial records into the cached snapshot by MAC and drop removed MACs.
+
+        Builds one new snapshot (indexes are per snapshot) with matching records
+        updated, as record_type instances when the snapshot holds those. Records
+        are found through the MAC index, which is carried over to the new
+        snapshot instead of being rebuilt. A partial record for a MAC that isn't
+        cached can't stand in for the full record, so it is dropped and the
+        snapshot goes back to TTL expiry until the next full fetch. Does nothing
+        if nothing is cached.
+        """
+        key = (site, endpoint)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            unknown = key in self._incomplete
+        if snapshot is None:
+            return None
+
+        by_mac = dict(snapshot.by_mac)
+        replaced: dict[int, Any] = {}
+        for record in records:
+            mac = normalize_mac(record.get("mac"))
+            current = by_mac.get(mac)
+            if current is None:
+                if mac:
+                    unknown = True
+                continue
+            if fields is not None:
+                record = {name: record[name] for name in fields if name in record}
+            update = current.merged(record) if record_type is not None else {**current, **record}
+            by_mac[mac] = replaced[id(current)] = update
+        for mac in removed:
+            current = by_mac.pop(normalize_mac(mac), None)
+            if current is not None:
+                replaced[id(current)] = None
+
+        updated = snapshot
+        if replaced:
+            data = [replaced.get(id(record), record) for record in snapshot.data]
+            updated = Snapshot(endpoint=endpoint, data=[record for record in data if record is not None], site=site)
+            if unknown:
+                updated.fetched_at = snapshot.fetched_at  # Incomplete: age from the last full fetch
+            updated.__dict__["by_mac"] = by_mac  # Kept in step above; no need to normalize every MAC again
+        with self._lock:
+            if self._snapshots.get(key) is snapshot:
+                self._snapshots[key] = updated
+            if unknown:
+                self._incomplete.add(key)
+        return updated
+
+    def put(self, endpoint: str, data: list[dict[str, Any]], site: Optional[str] = None,
+            fetched_at: Optional[float] = None) -> Snapshot:
+        """Store a freshly fetched response (or an older one, given its monotonic fetch time)"""
+        snapshot = Snapshot(endpoint=endpoint, data=data, site=site)
+        if fetched_at is not None:
+            snapshot.fetched_at = fetched_at
+        with self._lock:
+            self._snapshots[(site, endpoint)] = snapshot
+            self._incomplete.discard((site, endpoint))
+        return snapshot
+
+    def pin(self, snapshot: Snapshot) -> int:
+        """Keep a snapshot retrievable by id (evicting the endpoint's least recently used pin)"""
+        with self._lock:
+            self._pinned[snapshot.id] = snapshot
+            self._pinned.move_to_end(snapshot.id)
+            same = [pinned.id for pinned in self._pinned.values()
+                    if (pinned.site, pinned.endpoint) == (snapshot.site, snapshot.endpoint)]
+            for snapshot_id in same[:-self.max_pinned]:
+                del self._pinned[snapshot_id]
+        return snapshot.id
+
+    def pinned(self, snapshot_id: int) -> Optional[Snapshot]:
+        """A pinned snapshot by id, or None once it has been evicted"""
+        with self._lock:
+            snapshot = self._pinned.get(snapshot_id)
+            if snapshot is not None:
+                self._pinned.move_to_end(snapshot_id)
+        return snapshot
+
+    def invalidate(self, *endpoints: str):
+        """Drop cached snapshots for the given endpoints on every site (everything if none given)"""
+        with self._lock:
+            if not endpoints:
+                self._snapshots.clear()
+                self._incomplete.clear()
+                return
+            for key in [k for k in self._snapshots if k[1] in endpoints]:
+                del self._snapshots[key]
+                self._incomplete.discard(key)
@@ -0,0 +1,85 @@
+"""
+Last good snapshot of each cached endpoint, persisted between processes.
+
+Every fetched device, client and health list is written to one file per site
+and endpoint (a directory per site) in the controller's {"data": [...]} envelope, holding the same
+projected fields as the in-memory snapshot. A new process memory-maps the file
+and decodes it with the endpoint's usual decoder, so its first tool call is
+answered from disk (with the file's age) while a fresh copy is fetched in the
+background.
+"""
+
+import mmap
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import codec
+
+
+def default_snapshot_dir(host: str, port: int) -> Path:
+    """Where the last snapshots of a controller are persisted between processes"""
+    return Path.home() / ".cache" / "unifi-mcp" / f"snapshots-{host}-{port}"
+
+
+class SnapshotStore:
+    """One owner-only file per (site, endpoint) holding the last fetched records"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory).expanduser()
+
+    @staticmethod
+    def _name(text: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", text.strip("/"))
+
+    def path(self, site: str, endpoint: str) -> Path:
+        return self.directory / self._name(site) / f"{self._name(endpoint)}.json"
+
+    def save(self, site: str, endpoint: str, records: list[Any]):
+        """Atomically replace the stored records (compact records are saved as dicts)"""
+        body = codec.dumps({"data": [
+            record.to_dict() if hasattr(record, "to_dict") else record for record in records
+        ]}).encode()
+        path = self.path(site, endpoint)
+        try:
+            self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            path.parent.mkdir(mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # Persistence is an optimization; the in-memory snapshot still works
+
+    def discard(self, endpoint: str):
+        """Delete the stored records of an endpoint on every site (they are outdated)"""
+        try:
+            for path in self.directory.glob(f"*/{self._name(endpoint)}.json"):
+                path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def load(self, site: str, endpoint: str,
+             decode: Callable[[Any], list[Any]]) -> Optional[tuple[list[Any], float]]:
+        """
+        Decode the stored records straight from a memory map of the file.
+
+        Returns the records and the epoch time they were saved, or None if
+        nothing usable is stored.
+        """
+        path = self.path(site, endpoint)
+        try:
+            with open(path, "rb") as f:
+                saved_at = os.fstat(f.fileno()).st_mtime
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        records = decode(view)
+                    finally:
+                        view.release()
+        except (OSError, ValueError, TypeError):
+            return None  # Missing, empty or corrupt file: fetch as usual
+        return records, min(saved_at, time.time())
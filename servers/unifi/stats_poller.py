@@ -0,0 +1,214 @@
+"""
+Background sampler of UniFi byte counters.
+
+The controller only reports cumulative tx/rx byte counters. The poller samples
+/stat/sta and /stat/device at a fixed interval and keeps the last N samples per
+MAC in fixed-size, array-backed ring buffers so throughput over a sliding
+window can be computed. Memory is bounded by samples-per-series times the
+maximum number of series; series that stop reporting are evicted.
+"""
+
+import asyncio
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Optional
+
+from snapshot_cache import normalize_mac
+
+
+class CounterRing:
+    """Fixed-size ring of (time, tx_bytes, rx_bytes) samples backed by flat arrays"""
+
+    __slots__ = ("times", "tx", "rx", "start", "size")
+
+    def __init__(self, capacity: int):
+        self.times = array("d", bytes(8 * capacity))
+        self.tx = array("q", bytes(8 * capacity))
+        self.rx = array("q", bytes(8 * capacity))
+        self.start = 0
+        self.size = 0
+
+    def append(self, t: float, tx: int, rx: int):
+        """Add a sample, overwriting the oldest one when full"""
+        capacity = len(self.times)
+        i = (self.start + self.size) % capacity
+        self.times[i] = t
+        self.tx[i] = tx
+        self.rx[i] = rx
+        if self.size == capacity:
+            self.start = (self.start + 1) % capacity
+        else:
+            self.size += 1
+
+    @property
+    def last_time(self) -> float:
+        """Time of the newest sample (0 if empty)"""
+        if not self.size:
+            return 0.0
+        return self.times[(self.start + self.size - 1) % len(self.times)]
+
+    def rate(self, window: float, now: float) -> Optional[tuple[float, float, int]]:
+        """
+        Average (tx, rx) bytes per second over samples newer than now - window.
+
+        A counter that goes down was reset (client reconnected, device
+        rebooted), so its new value is counted as the bytes since the reset.
+        Returns None until there are two samples in the window.
+        """
+        if self.size < 2:
+            return None
+
+        capacity = len(self.times)
+        cutoff = now - window
+        tx_total = rx_total = 0
+        samples = 1
+
+        newest = (self.start + self.size - 1) % capacity
+        t_last = t_first = self.times[newest]
+        tx_next, rx_next = self.tx[newest], self.rx[newest]
+
+        for k in range(self.size - 2, -1, -1):
+            i = (self.start + k) % capacity
+            if self.times[i] < cutoff:
+                break
+            tx_prev, rx_prev = self.tx[i], self.rx[i]
+            tx_total += tx_next - tx_prev if tx_next >= tx_prev else tx_next
+            rx_total += rx_next - rx_prev if rx_next >= rx_prev else rx_next
+            tx_next, rx_next = tx_prev, rx_prev
+            t_first = self.times[i]
+            samples += 1
+
+        elapsed = t_last - t_first
+        if samples < 2 or elapsed <= 0:
+            return None
+        return tx_total / elapsed, rx_total / elapsed, samples
+
+
+class CounterHistory:
+    """Ring buffers keyed by normalized MAC, least recently updated evicted first"""
+
+    def __init__(self, capacity: int, max_series: int):
+        self.capacity = capacity
+        self.max_series = max_series
+        self._rings: OrderedDict[str, CounterRing] = OrderedDict()
+        self.labels: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def record(self, mac: str, t: float, tx: int, rx: int, label: Optional[str] = None):
+        """Append one sample for a MAC"""
+        ring = self._rings.get(mac)
+        if ring is None:
+            if len(self._rings) >= self.max_series:
+                evicted, _ = self._rings.popitem(last=False)
+                self.labels.pop(evicted, None)
+            ring = self._rings[mac] = CounterRing(self.capacity)
+        else:
+            self._rings.move_to_end(mac)
+        ring.append(t, tx, rx)
+        if label:
+            self.labels[mac] = label
+
+    def prune(self, older_than: float):
+        """Drop series whose newest sample is older than the given time"""
+        while self._rings:
+            mac, ring = next(iter(self._rings.items()))
+            if ring.last_time >= older_than:
+                break
+            del self._rings[mac]
+            self.labels.pop(mac, None)
+
+    def rate(self, mac: str, window: float, now: Optional[float] = None) -> Optional[tuple[float, float, int]]:
+        """Throughput of one MAC over the window (see CounterRing.rate)"""
+        ring = self._rings.get(normalize_mac(mac))
+        if ring is None:
+            return None
+        return ring.rate(window, time.time() if now is None else now)
+
+    def rates(self, window: float, now: Optional[float] = None) -> dict[str, tuple[float, float, int]]:
+        """Throughput of every MAC with enough samples in the window"""
+        now = time.time() if now is None else now
+        results = {}
+        for mac, ring in self._rings.items():
+            rate = ring.rate(window, now)
+            if rate is not None:
+                results[mac] = rate
+        return results
+
+
+class StatsPoller:
+    """
+    Periodically samples client and device byte counters from a controller.
+
+    Each poll forces a fresh /stat/sta and /stat/device fetch, which also keeps
+    the controller's snapshot cache warm for the other tools.
+    """
+
+    def __init__(self, ctrl, interval: float = 30.0, capacity: int = 60,
+                 max_clients: int = 10000, max_devices: int = 2000):
+        self.ctrl = ctrl
+        self.interval = interval
+        self.clients = CounterHistory(capacity, max_clients)
+        self.devices = CounterHistory(capacity, max_devices)
+        self.last_poll: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def retention(self) -> float:
+        """Seconds of history kept per series"""
+        return self.clients.capacity * self.interval
+
+    def start(self):
+        """Start polling in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop polling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def poll_once(self):
+        """Take one sample of every client and device"""
+        clients, devices = await asyncio.gather(
+            self.ctrl.get_clients(max_age=0),
+            self.ctrl.get_aps(max_age=0),
+        )
+        now = time.time()
+        self._record(self.clients, clients, now)
+        self._record(self.devices, devices, now)
+
+        # Forget MACs that have not reported for a full retention period
+        cutoff = now - self.retention
+        self.clients.prune(cutoff)
+        self.devices.prune(cutoff)
+        self.last_poll = now
+
+    @staticmethod
+    def _record(history: CounterHistory, records: list[dict[str, Any]], now: float):
+        for record in records:
+            mac = record.get("mac")
+            if not mac:
+                continue
+            history.record(
+                normalize_mac(mac), now,
+                int(record.get("tx_bytes") or 0), int(record.get("rx_bytes") or 0),
+                record.get("name") or record.get("hostname"),
+            )
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+            await asyncio.sleep(self.interval)
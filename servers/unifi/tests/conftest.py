@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The server's modules are flat files next to server.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,87 @@
+import time
+
+import aggregate
+from records import Client
+from snapshot_cache import Snapshot
+
+
+def _clients(n):
+    """n clients over 20 APs; every tenth is wired"""
+    return [Client.from_dict({
+        "mac": f"aa:bb:cc:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}",
+        "ap_mac": None if i % 10 == 0 else f"f0:9f:c2:00:00:{i % 20:02x}",
+        "is_wired": i % 10 == 0,
+        "signal": None if i % 10 == 0 else -40 - i % 50,
+        "tx_bytes": i, "rx_bytes": 2 * i,
+    }) for i in range(n)]
+
+
+def _naive(clients, field):
+    """Straightforward per-call reduction the memoized aggregation must beat"""
+    groups = {}
+    for client in clients:
+        group = groups.setdefault(client.get(field), {"n": 0, "tx": 0, "rx": 0, "signals": []})
+        group["n"] += 1
+        group["tx"] += client.get("tx_bytes") or 0
+        group["rx"] += client.get("rx_bytes") or 0
+        if client.get("signal") is not None and not client.get("is_wired"):
+            group["signals"].append(client.get("signal"))
+    for group in groups.values():
+        group["signals"].sort()
+    return groups
+
+
+def test_group_statistics():
+    clients = [
+        Client.from_dict({"mac": "aa:00:00:00:00:01", "ap_mac": "ap1", "signal": -70, "tx_bytes": 10, "rx_bytes": 1}),
+        Client.from_dict({"mac": "aa:00:00:00:00:02", "ap_mac": "ap1", "signal": -50, "tx_bytes": 20}),
+        Client.from_dict({"mac": "aa:00:00:00:00:03", "ap_mac": "ap1", "signal": -60}),
+        Client.from_dict({"mac": "aa:00:00:00:00:04", "ap_mac": "ap1", "is_wired": True, "signal": -1, "tx_bytes": 5}),
+        Client.from_dict({"mac": "aa:00:00:00:00:05", "is_wired": True, "rx_bytes": 7}),
+    ]
+    rows = {row[0]: row for row in aggregate.aggregate_clients(Snapshot("/stat/sta", clients), "ap_mac")}
+
+    assert rows["ap1"] == ["ap1", 4, 3, 35, 1, -70, -70, -60, -50, -60.0]
+    # Groups with no wireless client have no signal statistics
+    assert rows[None] == [None, 1, 0, 0, 7, None, None, None, None, None]
+
+
+def test_matches_naive_reduction():
+    clients = _clients(2000)
+    rows = aggregate.aggregate_clients(Snapshot("/stat/sta", clients), "ap_mac")
+    naive = _naive(clients, "ap_mac")
+
+    assert len(rows) == len(naive)
+    for key, n, wireless, tx, rx, low, *_ in rows:
+        group = naive[key]
+        assert (n, wireless, tx, rx) == (group["n"], len(group["signals"]), group["tx"], group["rx"])
+        assert low == (group["signals"][0] if group["signals"] else None)
+
+
+def test_repeat_breakdowns_beat_the_naive_loop():
+    clients = _clients(20000)
+    snapshot = Snapshot("/stat/sta", clients)
+    first = aggregate.aggregate_clients(snapshot, "ap_mac")
+
+    started = time.perf_counter()
+    for _ in range(5):
+        _naive(clients, "ap_mac")
+    naive_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(5):
+        repeat = aggregate.aggregate_clients(snapshot, "ap_mac")
+    memo_seconds = time.perf_counter() - started
+
+    assert repeat is first
+    assert memo_seconds * 100 < naive_seconds
+
+
+def test_top_groups_sorts_largest_first_with_missing_values_last():
+    rows = [["a", 1, 0, 5, 0, None, None, None, None, None],
+            ["b", 3, 3, 1, 0, -80, -79, -70, -60, -70.0],
+            ["c", 2, 2, 9, 0, -50, -50, -45, -40, -45.0]]
+
+    assert [row[0] for row in aggregate.top_groups(rows)] == ["b", "c", "a"]
+    assert [row[0] for row in aggregate.top_groups(rows, "signal_min")] == ["c", "b", "a"]
+    assert [row[0] for row in aggregate.top_groups(rows, "tx_bytes", limit=2)] == ["c", "a"]
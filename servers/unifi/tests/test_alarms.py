@@ -0,0 +1,26 @@
+import asyncio
+import random
+
+from async_unifi_os_controller import AsyncUniFiOSController
+
+
+def test_alarm_pages_do_not_depend_on_controller_sort_order():
+    ctrl = AsyncUniFiOSController("127.0.0.1", "user", "password")
+    alarms = [{"_id": str(i), "datetime": 1_000_000 + i * 1000} for i in range(20)]
+
+    async def post(endpoint, json_data=None, site=None):
+        shuffled = list(alarms)  # A controller that ignores _sort
+        random.Random(7).shuffle(shuffled)
+        return shuffled
+
+    ctrl._post = post
+
+    async def scenario():
+        oldest = await ctrl.get_alarms(limit=5, newer_than=1_004_000, oldest_first=True)
+        newest = await ctrl.get_alarms(limit=5, newer_than=1_004_000)
+        await ctrl.aclose()
+        return oldest, newest
+
+    oldest, newest = asyncio.run(scenario())
+    assert [a["_id"] for a in oldest] == ["5", "6", "7", "8", "9"]
+    assert [a["_id"] for a in newest] == ["19", "18", "17", "16", "15"]
@@ -0,0 +1,39 @@
+from change_feed import ChangeFeed
+from records import Device
+from server import DEVICE_CHANGE_FIELDS
+from snapshot_cache import Snapshot
+
+
+def _device(mac="d0:bb:cc:00:00:01", state=1, tx_bytes=1000, uplink_mac="f0:9f:c2:00:00:01"):
+    """An adopted AP as /stat/device returns it, with the nested uplink object"""
+    return Device.from_dict({
+        "mac": mac, "name": "ap1", "ip": "10.0.0.2", "state": state, "adopted": True,
+        "version": "6.6.55", "type": "uap", "tx_bytes": tx_bytes,
+        "uplink": {
+            "type": "wire", "uplink_mac": uplink_mac, "uplink_remote_port": 5, "speed": 1000,
+            "full_duplex": True, "up": True, "tx_bytes": tx_bytes, "rx_bytes": 2 * tx_bytes,
+        },
+    })
+
+
+def test_devices_with_uplink_objects_are_fingerprinted():
+    feed = ChangeFeed(DEVICE_CHANGE_FIELDS)
+    cursor = feed.observe(Snapshot("/stat/device", [_device()]))
+
+    feed.observe(Snapshot("/stat/device", [_device(tx_bytes=5000)]))
+    assert feed.changes_since(cursor) == {"added": [], "changed": [], "removed": []}
+
+    moved = _device(uplink_mac="f0:9f:c2:00:00:02")
+    feed.observe(Snapshot("/stat/device", [moved]))
+    assert feed.changes_since(cursor)["changed"] == [moved]
+
+
+def test_nested_values_are_fingerprinted_by_content():
+    feed = ChangeFeed(("name", "uplink"))
+    cursor = feed.observe(Snapshot("/stat/device", [{"mac": "aa", "uplink": {"a": 1, "b": [1, 2]}}]))
+
+    feed.observe(Snapshot("/stat/device", [{"mac": "aa", "uplink": {"b": [1, 2], "a": 1}}]))
+    assert feed.changes_since(cursor)["changed"] == []
+
+    feed.observe(Snapshot("/stat/device", [{"mac": "aa", "uplink": {"a": 2, "b": [1, 2]}}]))
+    assert len(feed.changes_since(cursor)["changed"]) == 1
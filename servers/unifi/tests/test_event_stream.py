@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+from event_stream import CLIENT_ENDPOINT, EventStream
+from records import CLIENT_FIELDS, Client
+from snapshot_cache import SnapshotCache
+
+SITE = "default"
+
+
+class _Controller:
+    """Just enough of AsyncUniFiOSController for EventStream.handle"""
+
+    site_id = SITE
+
+    def __init__(self, clients):
+        self.cache = SnapshotCache()
+        self.cache.put(CLIENT_ENDPOINT, [Client.from_dict(c) for c in clients], SITE)
+        self.cache.set_live(CLIENT_ENDPOINT, SITE, True)
+        self.applied = 0
+
+    def events_url(self, site):
+        return f"ws://controller/proxy/network/wss/s/{site}/events"
+
+    def apply_records(self, endpoint, records, site=None, removed=()):
+        self.applied += 1
+        return self.cache.upsert(endpoint, records, site, CLIENT_FIELDS, Client, removed)
+
+
+def _message(kind, data):
+    return json.dumps({"meta": {"rc": "ok", "message": kind}, "data": data})
+
+
+def test_messages_in_one_tick_make_one_snapshot():
+    ctrl = _Controller([{"mac": "aa:00:00:00:00:01", "name": "laptop", "tx_bytes": 1},
+                        {"mac": "aa:00:00:00:00:02", "name": "phone"}])
+    before = ctrl.cache.peek(CLIENT_ENDPOINT, SITE)
+    before.by_mac  # Built once; carried over to the merged snapshot
+
+    async def scenario():
+        stream = EventStream(ctrl)
+        stream.handle(_message("sta:sync", [{"mac": "AA:00:00:00:00:01", "tx_bytes": 5}]))
+        stream.handle(_message("sta:sync", [{"mac": "aa:00:00:00:00:01", "rx_bytes": 7}]))
+        stream.handle(_message("events", [{"key": "EVT_WU_Disconnected", "user": "aa:00:00:00:00:02"}]))
+        assert ctrl.applied == 0
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    after = ctrl.cache.get(CLIENT_ENDPOINT, None, SITE)
+
+    assert ctrl.applied == 1
+    assert [(c.mac, c.name, c.tx_bytes, c.rx_bytes) for c in after.data] == [("aa:00:00:00:00:01", "laptop", 5, 7)]
+    assert list(after.by_mac) == ["aa:00:00:00:00:01"]
+    assert before.lookup("aa:00:00:00:00:02") is not None  # Older snapshots are never changed
+
+
+def test_partial_record_for_unknown_mac_is_dropped_and_marks_snapshot_incomplete():
+    ctrl = _Controller([{"mac": "aa:00:00:00:00:01", "name": "laptop"}])
+    stream = EventStream(ctrl)
+    stream.handle(_message("sta:sync", [{"mac": "aa:00:00:00:00:09", "signal": -60, "tx_bytes": 1}]))
+
+    snapshot = ctrl.cache.peek(CLIENT_ENDPOINT, SITE)
+    assert [c.mac for c in snapshot.data] == ["aa:00:00:00:00:01"]
+    # No longer served past its TTL just because the stream is connected
+    snapshot.fetched_at -= 3600
+    assert ctrl.cache.get(CLIENT_ENDPOINT, None, SITE) is None
+    # A full fetch makes it complete (and live) again
+    ctrl.cache.put(CLIENT_ENDPOINT, snapshot.data, SITE, fetched_at=snapshot.fetched_at)
+    assert ctrl.cache.get(CLIENT_ENDPOINT, None, SITE) is not None
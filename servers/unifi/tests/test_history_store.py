@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from history_store import HistoryRecorder, HistoryStore
+
+
+class _Controller:
+    """Records the alarm queries a HistoryRecorder makes"""
+
+    site_id = "default"
+
+    def __init__(self, alarms):
+        self.alarms = alarms
+        self.alarm_queries = []
+
+    async def get_clients(self, max_age=None):
+        return []
+
+    async def get_aps(self, max_age=None):
+        return []
+
+    async def get_alarms(self, newer_than=None, within_hours=None):
+        self.alarm_queries.append({"newer_than": newer_than, "within_hours": within_hours})
+        return [a for a in self.alarms if newer_than is None or a["datetime"] > newer_than]
+
+
+def test_alarm_cursor_survives_restarts(tmp_path):
+    newest = int(time.time()) - 60
+    alarms = [{"_id": "a1", "datetime": (newest - 3600) * 1000 + 500, "key": "EVT_AP_Lost_Contact"},
+              {"_id": "a2", "datetime": newest * 1000 + 250, "key": "EVT_AP_Lost_Contact"}]
+    ctrl = _Controller(alarms)
+
+    store = HistoryStore(tmp_path / "history.db", retention_days=7)
+    asyncio.run(HistoryRecorder(ctrl, store).record_once())
+    store.close()
+    # Nothing stored yet: the first fetch is bounded by the retention period
+    assert ctrl.alarm_queries[0] == {"newer_than": None, "within_hours": 168}
+
+    store = HistoryStore(tmp_path / "history.db", retention_days=7)
+    asyncio.run(HistoryRecorder(ctrl, store).record_once())
+    # A new process continues after the newest stored alarm instead of re-reading them all
+    assert ctrl.alarm_queries[1] == {"newer_than": newest * 1000 - 1, "within_hours": None}
+    assert store.stats()["alarms"]["n"] == 2
+    store.close()
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from json_stream import DataArrayDecoder
+
+BODY = json.dumps({
+    "meta": {"rc": "ok", "note": "brackets ] and braces } in a string"},
+    "data": [
+        {"mac": "aa:00:00:00:00:01", "name": "say \"hi\" [1]", "tx_bytes": 123456789, "extra": {"a": [1, 2]}},
+        {"mac": "aa:00:00:00:00:02", "name": "phone", "signal": -61.5},
+        {"mac": "aa:00:00:00:00:03", "tx_bytes": 0},
+    ],
+    "count": 1234567,
+})
+
+
+def _decode(chunks, fields=None):
+    decoder = DataArrayDecoder(fields)
+    records = []
+    for chunk in chunks:
+        records.extend(decoder.feed(chunk))
+    records.extend(decoder.close())
+    return records
+
+
+def test_any_chunk_boundary_decodes_the_same():
+    expected = json.loads(BODY)["data"]
+    for size in (1, 2, 3, 7, 64, len(BODY)):
+        chunks = [BODY[i:i + size] for i in range(0, len(BODY), size)]
+        assert _decode(chunks) == expected, size
+
+
+def test_records_are_returned_as_soon_as_they_are_complete():
+    decoder = DataArrayDecoder()
+    first_end = BODY.index("}}") + 2  # End of the first record (its nested object closes too)
+    assert decoder.feed(BODY[:first_end - 1]) == []
+    assert [r["mac"] for r in decoder.feed(BODY[first_end - 1:first_end + 1])] == ["aa:00:00:00:00:01"]
+
+
+def test_projection_keeps_only_requested_fields():
+    records = _decode([BODY], fields=("mac", "tx_bytes"))
+    assert records == [
+        {"mac": "aa:00:00:00:00:01", "tx_bytes": 123456789},
+        {"mac": "aa:00:00:00:00:02"},
+        {"mac": "aa:00:00:00:00:03", "tx_bytes": 0},
+    ]
+
+
+def test_data_before_other_keys_and_empty_arrays():
+    assert _decode(['{"data": [], "meta": {"rc": "ok"}}']) == []
+    assert _decode(['{"data":[{"a":1}],"meta":{}}']) == [{"a": 1}]
+
+
+@pytest.mark.parametrize("body", [BODY[:-1], BODY[:len(BODY) // 2], '{"data": [{"a": 1}'])
+def test_truncated_response_raises(body):
+    with pytest.raises(ValueError):
+        _decode([body])
+
+
+def test_non_object_response_raises():
+    with pytest.raises(ValueError):
+        _decode(['[{"a": 1}]'])
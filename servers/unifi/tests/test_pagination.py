@@ -0,0 +1,62 @@
+import base64
+import json
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor, page_order, sort_key
+from snapshot_cache import Snapshot
+
+CLIENTS = [
+    {"mac": "aa:00:00:00:00:04", "name": "Printer", "ip": "10.0.0.10", "uptime": 50},
+    {"mac": "aa:00:00:00:00:02", "name": "laptop", "ip": "10.0.0.9", "uptime": 300},
+    {"mac": "aa:00:00:00:00:03", "name": None, "ip": None, "uptime": 300},
+    {"mac": "aa:00:00:00:00:01", "name": "camera", "ip": "fe80::1", "uptime": 10},
+]
+
+
+def _macs(records):
+    return [r["mac"][-1] for r in records]
+
+
+def _ordered(field, descending=False):
+    snapshot = Snapshot("/stat/sta", CLIENTS)
+    return page_order(snapshot, (None, field), lambda records: records,
+                      sort_key(field, lambda r: r.get(field)), descending)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(42, 20, k="clients", f="wireless", by="name", desc=True, n=20)
+    assert "=" not in cursor
+    state = decode_cursor(cursor)
+    assert (state["s"], state["o"], state["k"], state["f"], state["by"], state["desc"], state["n"]) == \
+        (42, 20, "clients", "wireless", "name", True, 20)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", base64.urlsafe_b64encode(b'{"s": "1", "o": 0}').decode()])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_cursors_from_another_process_are_rejected():
+    payload = {"p": "earlier", "s": 1, "o": 10}  # Nonces are hex, so never "earlier"
+    cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    with pytest.raises(ValueError, match="restarted"):
+        decode_cursor(cursor)
+
+
+def test_strings_sort_case_insensitively_with_missing_values_last():
+    assert _macs(_ordered("name")) == ["1", "2", "4", "3"]
+    assert _macs(_ordered("name", descending=True)) == ["4", "2", "1", "3"]
+
+
+def test_ips_sort_numerically_and_ties_break_by_mac():
+    assert _macs(_ordered("ip")) == ["2", "4", "1", "3"]
+    assert _macs(_ordered("uptime")) == ["1", "4", "2", "3"]
+
+
+def test_order_is_memoized_per_snapshot():
+    snapshot = Snapshot("/stat/sta", CLIENTS)
+    key = sort_key("uptime", lambda r: r.get("uptime"))
+    first = page_order(snapshot, ("x", "uptime"), lambda records: records, key)
+    assert page_order(snapshot, ("x", "uptime"), lambda records: [], key) is first
@@ -0,0 +1,75 @@
+from report_cache import ReportCache, report_query_key
+
+HOUR = 3_600_000  # Controller times are ms
+NOW = 1_700_000_000  # Epoch seconds, the "current" time of every store() below
+
+
+def _cache(tmp_path):
+    return ReportCache(tmp_path / "reports.db", settle_seconds=0)
+
+
+def _rows(start, end, step=HOUR):
+    return [{"time": t, "bytes": t // HOUR} for t in range(start, end + 1, step)]
+
+
+def test_query_keys_ignore_attribute_and_mac_order():
+    assert report_query_key("default", "hourly", "ap", ["num_sta", "bytes"], ["b", "a"]) == \
+        report_query_key("default", "hourly", "ap", ["bytes", "num_sta"], ["a", "b"])
+    assert report_query_key("default", "hourly", "ap", ["bytes"]) != \
+        report_query_key("other", "hourly", "ap", ["bytes"])
+
+
+def test_missing_ranges_around_covered_ones(tmp_path):
+    cache = _cache(tmp_path)
+    key = report_query_key("default", "hourly", "site", ["bytes"])
+    old = NOW * 1000 - 100 * HOUR
+    assert cache.missing(key, old, old + 10 * HOUR) == [(old, old + 10 * HOUR)]
+
+    cache.store(key, "hourly", old + 2 * HOUR, old + 4 * HOUR, _rows(old + 2 * HOUR, old + 4 * HOUR), now=NOW)
+    cache.store(key, "hourly", old + 6 * HOUR, old + 7 * HOUR, _rows(old + 6 * HOUR, old + 7 * HOUR), now=NOW)
+
+    # Coverage is half-open: [start, end + 1)
+    assert cache.missing(key, old, old + 10 * HOUR) == [
+        (old, old + 2 * HOUR - 1),
+        (old + 4 * HOUR + 1, old + 6 * HOUR - 1),
+        (old + 7 * HOUR + 1, old + 10 * HOUR),
+    ]
+    assert cache.missing(key, old + 2 * HOUR, old + 4 * HOUR) == []
+
+
+def test_adjacent_and_overlapping_ranges_merge(tmp_path):
+    cache = _cache(tmp_path)
+    key = report_query_key("default", "hourly", "site", ["bytes"])
+    old = NOW * 1000 - 100 * HOUR
+    for start, end in [(0, 3), (3, 5), (8, 9), (4, 8)]:
+        cache.store(key, "hourly", old + start * HOUR, old + end * HOUR, [], now=NOW)
+
+    assert cache._coverage(key) == [(old, old + 9 * HOUR + 1)]
+    assert cache.missing(key, old, old + 9 * HOUR) == []
+
+
+def test_unsettled_buckets_are_stored_but_not_covered(tmp_path):
+    cache = _cache(tmp_path)
+    key = report_query_key("default", "hourly", "site", ["bytes"])
+    now_ms = NOW * 1000
+    start = now_ms - 5 * HOUR
+    stored = cache.store(key, "hourly", start, now_ms, _rows(start, now_ms), now=NOW)
+
+    assert stored == 6
+    assert len(cache.rows(key, start, now_ms)) == 6
+    # Only buckets that ended an interval ago are final; the rest is fetched again next time
+    assert cache.missing(key, start, now_ms) == [(now_ms - HOUR, now_ms)]
+
+
+def test_refetch_replaces_rows_and_rows_come_back_oldest_first(tmp_path):
+    cache = _cache(tmp_path)
+    key = report_query_key("default", "hourly", "ap", ["bytes"])
+    old = NOW * 1000 - 100 * HOUR
+    cache.store(key, "hourly", old, old + HOUR, [
+        {"time": old + HOUR, "ap": "b", "bytes": 1},
+        {"time": old, "ap": "a", "bytes": 2},
+        {"time": old + 50 * HOUR, "ap": "a", "bytes": 3},  # Outside the fetched range: ignored
+    ], now=NOW)
+    cache.store(key, "hourly", old, old + HOUR, [{"time": old, "ap": "a", "bytes": 5}], now=NOW)
+
+    assert cache.rows(key, old, old + 100 * HOUR) == [{"time": old, "ap": "a", "bytes": 5}]
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from async_unifi_os_controller import AsyncSingleFlight
+
+
+def test_cancelled_waiter_does_not_cancel_the_others():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "devices"
+
+        # The first caller gives up (like a per-controller timeout); the second keeps waiting
+        impatient = asyncio.create_task(asyncio.wait_for(flight.do("key", fetch), 0.01))
+        await asyncio.sleep(0.001)  # The impatient caller starts the fetch
+        patient = asyncio.create_task(flight.do("key", fetch))
+        with pytest.raises(asyncio.TimeoutError):
+            await impatient
+        return await patient, len(calls), flight._inflight
+
+    result, calls, inflight = asyncio.run(scenario())
+    assert result == "devices"
+    assert calls == 1
+    assert inflight == {}
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def scenario():
+        flight = AsyncSingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("controller down")
+
+        outcomes = await asyncio.gather(flight.do("key", fail), flight.do("key", fail),
+                                        return_exceptions=True)
+        return outcomes, flight._inflight
+
+    outcomes, inflight = asyncio.run(scenario())
+    assert [type(outcome) for outcome in outcomes] == [ValueError, ValueError]
+    assert inflight == {}